@@ -0,0 +1,41 @@
+import os
+
+# Cache config
+# https://docs.djangoproject.com/en/4.1/topics/cache/
+
+# Backend of the movies API response cache and of the film counts: "locmem" (LRU in the memory of the worker)
+# or "redis"
+MOVIES_API_CACHE_BACKEND = os.environ.get("MOVIES_API_CACHE_BACKEND", "locmem")
+# Responses of the movies API are cached. Changes of the catalog invalidate the cache of the process that made them
+# (movies.signals, import_movies), so with several uWSGI processes or with management commands the cache must be
+# shared: by default it is enabled only with the redis backend. locmem is correct only for a single process.
+MOVIES_API_CACHE_ENABLED = os.environ.get(
+    "MOVIES_API_CACHE_ENABLED", str(MOVIES_API_CACHE_BACKEND == "redis")
+) == "True"
+
+if MOVIES_API_CACHE_BACKEND == "redis":
+    movies_api_cache = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://:{}@{}:{}/{}".format(
+            os.environ.get("REDIS_PASSWORD", ""),
+            os.environ.get("REDIS_HOST", "localhost"),
+            os.environ.get("REDIS_PORT", "6379"),
+            os.environ.get("REDIS_API_CACHE_DB", "2"),
+        ),
+    }
+else:
+    movies_api_cache = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "movies_api",
+        "OPTIONS": {
+            # The least recently used responses are removed when the limit is reached.
+            "MAX_ENTRIES": int(os.environ.get("MOVIES_API_CACHE_MAX_ENTRIES", "1000")),
+        },
+    }
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "movies_api": movies_api_cache,
+}
@@ -3,6 +3,15 @@ import os
 # Database config
 # https://docs.djangoproject.com/en/4.1/ref/settings/#databases
 
+# "direct" - connections to PostgresSQL, "pgbouncer" - connections to pgbouncer in the transaction pooling mode
+# (see docker-compose.pgbouncer.yml)
+DB_POOL_MODE = os.environ.get("DB_POOL_MODE", "direct")
+
+# Seconds for which a connection of a worker thread is kept between requests: 0 closes it at the end of each
+# request, an empty value keeps it forever. A worker keeps at most one connection per thread, so PostgresSQL
+# (or pgbouncer) needs max_connections >= processes * threads of all workers (see manage.py db_connections).
+db_conn_max_age = os.environ.get("DB_CONN_MAX_AGE", "60")
+
 DATABASES = {
     "default": {
         "ENGINE": os.environ.get("SQL_ENGINE", "django.db.backends.sqlite3"),
@@ -11,9 +20,21 @@ DATABASES = {
         "PASSWORD": os.environ.get("SQL_PASSWORD", "password"),
         "HOST": os.environ.get("SQL_HOST", "localhost"),
         "PORT": os.environ.get("SQL_PORT", "5432"),
+        "CONN_MAX_AGE": int(db_conn_max_age) if db_conn_max_age else None,
+        # A persistent connection is checked before it is reused in a new request.
+        "CONN_HEALTH_CHECKS": os.environ.get("DB_CONN_HEALTH_CHECKS", "True") == "True",
+        # Cursors are not kept between transactions of pgbouncer, querysets are read at once instead.
+        "DISABLE_SERVER_SIDE_CURSORS": DB_POOL_MODE == "pgbouncer",
         "OPTIONS": {
             # Нужно явно указать схемы, с которыми будет работать приложение.
-            "options": "-c search_path=public,content"
+            "options": "-c search_path=public,content",
+            # Connections of a worker process are counted by this name in pg_stat_activity.
+            "application_name": "movies_admin:{}".format(os.getpid()),
         },
     }
 }
+
+if DB_POOL_MODE == "pgbouncer":
+    # pgbouncer does not pass startup options to the server, the search path is set for the role
+    # (ALTER ROLE ... SET search_path = public, content).
+    del DATABASES["default"]["OPTIONS"]["options"]
@@ -1,4 +1,6 @@
 MIDDLEWARE = [
+    # First, so that the total time includes the other middleware.
+    "movies.metrics.request_metrics_middleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
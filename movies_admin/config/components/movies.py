@@ -1,3 +1,67 @@
+import ipaddress
+import os
+
 # Movies api config
 
 MOVIES_PAGE_SIZE = 50
+
+# Maximum number of ids in one request of /api/v1/movies/batch
+MOVIES_BATCH_MAX_IDS = 100
+
+# Number of films read from the server-side cursor at a time by /api/v1/movies/export
+MOVIES_EXPORT_CHUNK_SIZE = 2000
+
+# Loading genres and persons: "aggregate" (one query with ArrayAgg over joins) or
+# "prefetch" (page of films, then genres and persons for its ids)
+MOVIES_QUERY_STRATEGY = "aggregate"
+
+# Cursor pagination (?pagination=cursor) sorts films by this field and id
+MOVIES_CURSOR_SORT_FIELD = "-creation_date"
+
+# Number of films in the list API: "exact", "cached" (invalidated when films change) or
+# "estimate" (planner statistics for unfiltered lists)
+MOVIES_COUNT_MODE = os.environ.get("MOVIES_COUNT_MODE", "cached")
+
+# Seconds for which the number of films is cached (in the "movies_api" cache, see components/caches.py)
+MOVIES_COUNT_CACHE_TTL = 60
+
+# Responses of the movies API are cached in the "movies_api" cache if MOVIES_API_CACHE_ENABLED
+# (see components/caches.py)
+MOVIES_API_CACHE_ALIAS = "movies_api"
+# Seconds for which a response is cached; changes of films, genres and persons invalidate responses earlier
+MOVIES_API_CACHE_TTL = 300
+# max-age of the Cache-Control header of cached responses, lets nginx micro-cache them (see src/configs_prod);
+# clients and nginx may serve a response this many seconds after a change of the catalog. 0 - no header
+MOVIES_API_MAX_AGE = int(os.environ.get("MOVIES_API_MAX_AGE", 0))
+
+# Serializer of the movies API responses: movies.api.v1.renderers.JSONRenderer (json + DjangoJSONEncoder)
+# or movies.api.v1.renderers.OrjsonRenderer (falls back to JSONRenderer if orjson is not installed)
+MOVIES_API_RENDERER = "movies.api.v1.renderers.OrjsonRenderer"
+
+# Admin changelists of films and persons without exact counts of the tables (see movies.admin_tools)
+MOVIES_ADMIN_HIGH_VOLUME = os.environ.get("MOVIES_ADMIN_HIGH_VOLUME", "True") == "True"
+# Filtered changelists are counted exactly up to this number of objects, bigger ones are estimated
+MOVIES_ADMIN_EXACT_COUNT_LIMIT = 10000
+# Number of genres and persons of a film on a page of the inlines of the film admin
+MOVIES_ADMIN_INLINE_PER_PAGE = 50
+
+# Elasticsearch index "movies" filled by postgres_to_es, used by /api/v1/movies/search/
+MOVIES_SEARCH_ES_URL = "http://{}:{}".format(os.environ.get("ES_HOST", "localhost"), os.environ.get("ES_PORT", "9200"))
+MOVIES_SEARCH_INDEX = "movies"
+# Seconds to wait for a response of Elasticsearch
+MOVIES_SEARCH_TIMEOUT = 5
+
+# Requests whose paths start with these prefixes get the Server-Timing header and Prometheus metrics
+# (movies.metrics.request_metrics_middleware)
+MOVIES_METRICS_PATHS = ["/api/v1/movies/", "/admin/"]
+# Prometheus metrics at /metrics (if prometheus_client is installed), only for clients from these networks
+# (separated by whitespace; parsed here, so an invalid network fails the startup)
+MOVIES_METRICS_ENDPOINT_ENABLED = os.environ.get("MOVIES_METRICS_ENDPOINT_ENABLED", "False") == "True"
+MOVIES_METRICS_ALLOWED_NETWORKS = [
+    ipaddress.ip_network(network)
+    for network in os.environ.get("MOVIES_METRICS_ALLOWED_NETWORKS", "127.0.0.1/32 ::1/128").split()
+]
+# Queries slower than this number of milliseconds are logged by the "movies.slow_queries" logger,
+# with the given probability to limit the volume of logs
+MOVIES_METRICS_SLOW_QUERY_MS = 100
+MOVIES_METRICS_SLOW_QUERY_SAMPLE_RATE = float(os.environ.get("MOVIES_METRICS_SLOW_QUERY_SAMPLE_RATE", "0.1"))
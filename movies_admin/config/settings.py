@@ -21,6 +21,7 @@ load_dotenv()
 # Load config from other files.
 include(
     "components/database.py",
+    "components/caches.py",
     "components/middleware.py",
     "components/templates.py",
     "components/installed_apps.py",
@@ -16,7 +16,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from movies.metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("movies.api.urls")),
+    # Not proxied by nginx, scraped from MOVIES_METRICS_ALLOWED_NETWORKS if MOVIES_METRICS_ENDPOINT_ENABLED.
+    path("metrics", metrics_view),
 ]
@@ -19,6 +19,9 @@ python manage.py migrate
 if [ `ls /opt/app/static/ | wc -l` -eq 0 ]
 then
     python manage.py collectstatic --no-input --clear
+    # Compressed copies for gzip_static of nginx
+    find /opt/app/static/ -type f \( -name '*.css' -o -name '*.js' -o -name '*.svg' -o -name '*.txt' \) \
+        -exec gzip -9 -k -f {} +
 fi
 
 exec "$@"
\ No newline at end of file
@@ -1,21 +1,35 @@
 from django.contrib import admin
+from .admin_tools import HighVolumeAdminMixin, IndexedSearchMixin, PaginatedInlineMixin, RatingRangeFilter
 from .models import FilmWork, Genre, Person, GenreFilmWork, PersonFilmWork
 
 
-class GenreFilmWorkInline(admin.TabularInline):
+class GenreFilmWorkInline(PaginatedInlineMixin, admin.TabularInline):
     model = GenreFilmWork
+    # Selects with search by AJAX instead of options with all genres and persons in each row.
+    autocomplete_fields = ("genre",)
+    list_select_related = ("genre",)
+    ordering = ("genre__name",)
+    extra = 1
 
 
-class PersonFilmWorkInline(admin.TabularInline):
+class PersonFilmWorkInline(PaginatedInlineMixin, admin.TabularInline):
     model = PersonFilmWork
+    autocomplete_fields = ("person",)
+    list_select_related = ("person",)
+    ordering = ("role", "person__full_name")
+    extra = 1
 
 
 @admin.register(FilmWork)
-class FilmWorkAdmin(admin.ModelAdmin):
+class FilmWorkAdmin(IndexedSearchMixin, HighVolumeAdminMixin, admin.ModelAdmin):
     inlines = (GenreFilmWorkInline, PersonFilmWorkInline)
     list_display = ("title", "type", "creation_date", "rating", "created", "modified")
-    list_filter = ("type", "rating", "creation_date", "created")
+    # Filters by indexed columns without queries of distinct values.
+    list_filter = ("type", RatingRangeFilter, "creation_date")
+    # search_fields show the search box, the search itself is done by IndexedSearchMixin.
     search_fields = ("title", "description", "id")
+    trigram_search_fields = ("title",)
+    fulltext_search_fields = ("description",)
 
 
 @admin.register(Genre)
@@ -26,7 +40,8 @@ class GenreAdmin(admin.ModelAdmin):
 
 
 @admin.register(Person)
-class PersonAdmin(admin.ModelAdmin):
+class PersonAdmin(IndexedSearchMixin, HighVolumeAdminMixin, admin.ModelAdmin):
     list_display = ("full_name", "created", "modified")
     list_filter = ("created", "modified")
-    search_fields = ("full_name", "description", "id")
+    search_fields = ("full_name", "id")
+    trigram_search_fields = ("full_name",)
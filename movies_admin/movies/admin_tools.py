@@ -0,0 +1,173 @@
+import json
+import uuid
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.core.paginator import Paginator
+from django.forms.models import BaseInlineFormSet
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+
+from movies.api.v1.counts import CountProvider
+
+
+def explain_rows(queryset: QuerySet) -> int | None:
+    """Number of rows of the queryset estimated by the planner."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator of admin changelists for large tables.
+
+    The number of objects of an unfiltered list is taken from the table statistics (pg_class.reltuples).
+    Filtered lists are counted exactly up to exact_count_limit, bigger results are estimated by the planner.
+    A page is selected by ids first (an index-only scan with OFFSET), then only its rows are read.
+    """
+    exact_count_limit = settings.MOVIES_ADMIN_EXACT_COUNT_LIMIT
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.has_filters():
+            estimated = CountProvider.estimate(queryset)
+            if estimated is not None:
+                return estimated
+        limited = queryset.values("pk")[:self.exact_count_limit + 1].count()
+        if limited <= self.exact_count_limit:
+            return limited
+        return max(explain_rows(queryset) or 0, limited)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        ids = list(self.object_list.values_list("pk", flat=True)[bottom:bottom + self.per_page])
+        return self._get_page(self.object_list.filter(pk__in=ids), number, self)
+
+
+class HighVolumeAdminMixin:
+    """Changelist without exact counts of large tables (MOVIES_ADMIN_HIGH_VOLUME)."""
+    if settings.MOVIES_ADMIN_HIGH_VOLUME:
+        paginator = EstimatedCountPaginator
+        # Otherwise the changelist counts the whole table to show "N total" with a filtered list.
+        show_full_result_count = False
+
+
+class RatingRangeFilter(admin.SimpleListFilter):
+    """Rating ranges instead of the list of all distinct ratings, the filter uses film_work_rating_idx."""
+    title = _("rating")
+    parameter_name = "rating_range"
+    ranges = {
+        "0-3": (0, 3),
+        "3-5": (3, 5),
+        "5-7": (5, 7),
+        "7-8": (7, 8),
+        "8+": (8, None),
+    }
+
+    def lookups(self, request, model_admin):
+        return [(key, key) for key in self.ranges]
+
+    def queryset(self, request, queryset):
+        if self.value() not in self.ranges:
+            return queryset
+        low, high = self.ranges[self.value()]
+        queryset = queryset.filter(rating__gte=low)
+        return queryset.filter(rating__lt=high) if high is not None else queryset
+
+
+class IndexedSearchMixin:
+    """Admin search that uses indexes instead of icontains scans over all search_fields.
+
+    A UUID is looked up by the primary key, other terms by substrings of trigram_search_fields
+    (GIN indexes with gin_trgm_ops over UPPER(field)) or words of fulltext_search_fields
+    (GIN indexes over to_tsvector('simple', field)).
+    """
+    trigram_search_fields = ()
+    fulltext_search_fields = ()
+    fulltext_config = "simple"
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        try:
+            return queryset.filter(pk=uuid.UUID(search_term)), False
+        except ValueError:
+            pass
+        conditions = [Q(**{"{}__icontains".format(field): search_term}) for field in self.trigram_search_fields]
+        for field in self.fulltext_search_fields:
+            alias = "{}_search_vector".format(field)
+            # alias() is not selected, the expression only has to match the one of the index.
+            queryset = queryset.alias(**{alias: SearchVector(field, config=self.fulltext_config)})
+            conditions.append(Q(**{alias: SearchQuery(search_term, config=self.fulltext_config)}))
+        if not conditions:
+            return queryset, False
+        return queryset.filter(reduce(or_, conditions)), False
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Inline formset with one page of the related objects, the page is chosen by the "<prefix>_page" parameter."""
+    per_page = settings.MOVIES_ADMIN_INLINE_PER_PAGE
+    page_number = 1
+    query_params = None
+
+    @classmethod
+    def get_page_param(cls) -> str:
+        return "{}_page".format(cls.get_default_prefix())
+
+    def get_queryset(self):
+        if not hasattr(self, "_page_queryset"):
+            self.paginator = Paginator(super().get_queryset(), self.per_page)
+            self.page = self.paginator.get_page(self.page_number)
+            self._page_queryset = self.page.object_list
+        return self._page_queryset
+
+    def _construct_form(self, i, **kwargs):
+        form = super()._construct_form(i, **kwargs)
+        if self.instance.pk is not None:
+            # Otherwise __str__ of every related object loads the parent object again.
+            setattr(form.instance, self.fk.name, self.instance)
+        return form
+
+    def page_links(self) -> list[tuple]:
+        """(page number, query string) for links to the pages, the query string is None for the current page."""
+        self.get_queryset()
+        links = []
+        for number in self.paginator.get_elided_page_range(self.page.number):
+            if number == self.page.number or number == self.paginator.ELLIPSIS:
+                links.append((number, None))
+                continue
+            params = self.query_params.copy()
+            params[self.get_page_param()] = number
+            links.append((number, params.urlencode()))
+        return links
+
+
+class PaginatedInlineMixin:
+    """Inline with paginated related objects, which are loaded with list_select_related."""
+    formset = PaginatedInlineFormSet
+    template = "admin/movies/edit_inline/paginated_tabular.html"
+    list_select_related = ()
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(*self.list_select_related)
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.query_params = request.GET
+        formset.page_number = request.GET.get(formset.get_page_param(), 1)
+        return formset
@@ -0,0 +1,98 @@
+from hashlib import md5
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Max
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from movies.models import FilmWork
+
+
+class ResponseCache:
+    """Cache of API responses keyed by path and query parameters.
+
+    Responses carry ETag and Last-Modified, conditional requests get 304. Any change of films, genres,
+    persons or their links (see movies.signals) changes the version in the keys, so all responses are invalidated.
+    """
+    VERSION_KEY = "movies_api_version"
+    LAST_MODIFIED_KEY = "movies_api_last_modified"
+
+    def __init__(self, alias: str, ttl: int):
+        self.alias = alias
+        self.ttl = ttl
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def invalidate(self):
+        try:
+            self.cache.incr(self.VERSION_KEY)
+        except ValueError:
+            self.cache.set(self.VERSION_KEY, 1, None)
+        self.cache.set(self.LAST_MODIFIED_KEY, timezone.now().timestamp(), None)
+
+    def get_last_modified(self) -> float:
+        """Time of the last change of the catalog, initially the latest FilmWork.modified."""
+        last_modified = self.cache.get(self.LAST_MODIFIED_KEY)
+        if last_modified is None:
+            latest = FilmWork.objects.aggregate(latest=Max("modified"))["latest"] or timezone.now()
+            last_modified = latest.timestamp()
+            self.cache.add(self.LAST_MODIFIED_KEY, last_modified, None)
+        return last_modified
+
+    def get_key(self, request: HttpRequest) -> str:
+        version = self.cache.get_or_set(self.VERSION_KEY, 1, None)
+        query = urlencode(sorted(request.GET.lists()), doseq=True)
+        return "movies_api:{}:{}".format(version, md5("{}?{}".format(request.path, query).encode()).hexdigest())
+
+    def get(self, request: HttpRequest) -> dict | None:
+        return self.cache.get(self.get_key(request))
+
+    def set(self, request: HttpRequest, response: HttpResponse) -> dict:
+        # The key is taken before the last modification time, so a concurrent change invalidates the entry.
+        key = self.get_key(request)
+        entry = {
+            "content": response.content,
+            "content_type": response["Content-Type"],
+            "etag": '"{}"'.format(md5(response.content).hexdigest()),
+            "last_modified": self.get_last_modified(),
+        }
+        self.cache.set(key, entry, self.ttl)
+        return entry
+
+    @staticmethod
+    def to_response(request: HttpRequest, entry: dict) -> HttpResponse:
+        """Response from the cache entry, 304 if the client has the same version."""
+        last_modified = int(entry["last_modified"])
+        response = get_conditional_response(request, etag=entry["etag"], last_modified=last_modified)
+        if response is None:
+            response = HttpResponse(entry["content"], content_type=entry["content_type"])
+        response.headers["ETag"] = entry["etag"]
+        response.headers["Last-Modified"] = http_date(last_modified)
+        if settings.MOVIES_API_MAX_AGE:
+            patch_cache_control(response, public=True, max_age=settings.MOVIES_API_MAX_AGE)
+        return response
+
+
+response_cache = ResponseCache(settings.MOVIES_API_CACHE_ALIAS, settings.MOVIES_API_CACHE_TTL)
+
+
+class CachedResponseMixin:
+    """Serves GET requests of the view from the response cache."""
+    cache_responses = settings.MOVIES_API_CACHE_ENABLED
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.cache_responses or request.method != "GET":
+            return super().dispatch(request, *args, **kwargs)
+        entry = response_cache.get(request)
+        if entry is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200 or response.streaming:
+                return response
+            entry = response_cache.set(request, response)
+        return response_cache.to_response(request, entry)
@@ -0,0 +1,75 @@
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.db.models import QuerySet
+
+
+class CountProvider:
+    """Number of films for the list API.
+
+    Modes:
+        exact - COUNT on every call;
+        cached - exact count cached for the TTL, invalidated when films are saved or deleted;
+        estimate - the number of rows from the planner statistics (pg_class.reltuples) for unfiltered lists,
+            cached count for filtered lists.
+
+    Counts and their version are kept in the cache of the API responses (MOVIES_API_CACHE_ALIAS), which is
+    shared by all workers, so a change in one worker invalidates the counts of the others.
+    """
+    MODES = ("exact", "cached", "estimate")
+    VERSION_KEY = "movies_count_version"
+
+    def __init__(self, mode: str = "cached", ttl: int = 60):
+        if mode not in self.MODES:
+            raise ValueError("Unknown count mode \"{}\"".format(mode))
+        self.mode = mode
+        self.ttl = ttl
+
+    @staticmethod
+    def get_cache():
+        return caches[settings.MOVIES_API_CACHE_ALIAS]
+
+    @classmethod
+    def invalidate(cls):
+        """Invalidate all cached counts by changing the version in their keys."""
+        cache = cls.get_cache()
+        try:
+            cache.incr(cls.VERSION_KEY)
+        except ValueError:
+            cache.set(cls.VERSION_KEY, 1, None)
+
+    @staticmethod
+    def estimate(queryset: QuerySet) -> int | None:
+        """Number of rows of the table from statistics, None if the table has not been analyzed yet."""
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+                [connection.ops.quote_name(queryset.model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+        if row is None or row[0] is None or row[0] <= 0:
+            return None
+        return row[0]
+
+    def _cache_key(self, queryset: QuerySet) -> str:
+        version = self.get_cache().get_or_set(self.VERSION_KEY, 1, None)
+        query_hash = md5(str(queryset.query).encode()).hexdigest()
+        return "movies_count:{}:{}".format(version, query_hash)
+
+    def count(self, queryset: QuerySet) -> int:
+        """Count films of the queryset. Aggregates must not be added to the queryset, they don't change the count."""
+        if self.mode == "exact":
+            return queryset.count()
+        if self.mode == "estimate" and not queryset.query.has_filters():
+            estimated = self.estimate(queryset)
+            if estimated is not None:
+                return estimated
+        return self.get_cache().get_or_set(self._cache_key(queryset), queryset.count, self.ttl)
+
+
+count_provider = CountProvider(settings.MOVIES_COUNT_MODE, settings.MOVIES_COUNT_CACHE_TTL)
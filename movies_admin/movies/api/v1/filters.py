@@ -0,0 +1,59 @@
+from django.core.exceptions import BadRequest
+from django.db.models import QuerySet
+from django.http import QueryDict
+
+from movies.models import FilmWork, GenreFilmWork
+
+
+class MoviesFilter:
+    """Filtering and sorting of the films list by query parameters.
+
+    Parameters:
+        type - type of the film;
+        genre - name of a genre of the film;
+        rating_min, rating_max - rating range (film_work_rating_idx);
+        sort - rating or creation_date, "-" for descending order (film_work_rating_idx,
+            film_work_creation_date_idx).
+    """
+    sort_fields = ("rating", "creation_date")
+
+    def __init__(self, params: QueryDict):
+        self.params = params
+
+    @staticmethod
+    def _get_float(params: QueryDict, name: str) -> float | None:
+        value = params.get(name)
+        if value is None or value == "":
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            raise BadRequest("Parameter \"{}\" must be a number".format(name))
+
+    def get_sort(self) -> str | None:
+        sort = self.params.get("sort")
+        if not sort:
+            return None
+        if sort.lstrip("-") not in self.sort_fields:
+            raise BadRequest("Sorting is possible by: {}".format(", ".join(self.sort_fields)))
+        return sort
+
+    def filter(self, queryset: QuerySet) -> QuerySet:
+        film_type = self.params.get("type")
+        if film_type:
+            if film_type not in FilmWork.Types.values:
+                raise BadRequest("Unknown type \"{}\"".format(film_type))
+            queryset = queryset.filter(type=film_type)
+        genre = self.params.get("genre")
+        if genre:
+            # A subquery, so that the join with genres is not reused by the aggregation of genres.
+            queryset = queryset.filter(
+                id__in=GenreFilmWork.objects.filter(genre__name=genre).values("film_work_id")
+            )
+        rating_min = self._get_float(self.params, "rating_min")
+        if rating_min is not None:
+            queryset = queryset.filter(rating__gte=rating_min)
+        rating_max = self._get_float(self.params, "rating_max")
+        if rating_max is not None:
+            queryset = queryset.filter(rating__lte=rating_max)
+        return queryset
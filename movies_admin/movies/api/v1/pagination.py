@@ -0,0 +1,107 @@
+import base64
+import json
+from datetime import datetime
+
+from typing import Callable
+
+from django.core.exceptions import BadRequest, ValidationError
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Model, Q, QuerySet
+from django.utils.functional import cached_property
+
+
+class CountedPaginator(Paginator):
+    """Paginator that takes the number of objects from count_func instead of COUNT over the object list."""
+
+    def __init__(self, object_list, per_page, count_func: Callable[[], int], **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_func = count_func
+
+    @cached_property
+    def count(self):
+        return self.count_func()
+
+
+class KeysetPaginator:
+    """Cursor pagination by (sort field, id).
+
+    Instead of OFFSET the next page is selected by the values of the last record, so the latency of
+    deep pages does not depend on the page number. The cursor is an opaque token for clients.
+    Records with NULL in the sort field go last.
+    """
+
+    def __init__(self, sort_field: str, per_page: int, key_field: str = "id"):
+        self.descending = sort_field.startswith("-")
+        self.field = sort_field.lstrip("-")
+        self.per_page = per_page
+        self.key_field = key_field
+
+    @staticmethod
+    def encode_cursor(values: list) -> str:
+        # DjangoJSONEncoder truncates datetimes to milliseconds, but the cursor needs the exact value.
+        values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+        data = json.dumps(values, cls=DjangoJSONEncoder, separators=(",", ":"))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> list:
+        try:
+            data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            values = json.loads(data)
+        except ValueError:
+            raise BadRequest("Invalid cursor")
+        if not isinstance(values, list) or len(values) != 2:
+            raise BadRequest("Invalid cursor")
+        return values
+
+    def get_ordering(self) -> list:
+        if self.field == self.key_field:
+            return ["-" + self.key_field if self.descending else self.key_field]
+        order = F(self.field).desc(nulls_last=True) if self.descending else F(self.field).asc(nulls_last=True)
+        return [order, self.key_field]
+
+    def clean_cursor(self, model: type[Model], cursor: str) -> tuple:
+        """Values of the cursor converted by the fields of the model, BadRequest if the cursor was tampered with."""
+        value, key = self.decode_cursor(cursor)
+        try:
+            if value is not None:
+                value = model._meta.get_field(self.field).to_python(value)
+            key = model._meta.get_field(self.key_field).to_python(key)
+        except (ValidationError, TypeError):
+            raise BadRequest("Invalid cursor")
+        if key is None:
+            raise BadRequest("Invalid cursor")
+        return value, key
+
+    def get_cursor_filter(self, model: type[Model], cursor: str) -> Q:
+        """Condition for the records following the cursor."""
+        return self.get_after_filter(*self.clean_cursor(model, cursor))
+
+    def get_after_filter(self, value, key) -> Q:
+        """Condition for the records following the record with (value, key) in the ordering."""
+        if self.field == self.key_field:
+            return Q(**{"{}__{}".format(self.key_field, "lt" if self.descending else "gt"): key})
+        after_key = Q(**{"{}__gt".format(self.key_field): key})
+        if value is None:
+            return Q(**{"{}__isnull".format(self.field): True}) & after_key
+        lookup = "lt" if self.descending else "gt"
+        return (
+            Q(**{"{}__{}".format(self.field, lookup): value})
+            | Q(**{self.field: value}) & after_key
+            | Q(**{"{}__isnull".format(self.field): True})
+        )
+
+    def paginate(self, queryset: QuerySet, cursor: str | None) -> tuple[list, str | None]:
+        """Get the records of the page after the cursor and the cursor of the next page."""
+        queryset = queryset.order_by(*self.get_ordering())
+        if cursor:
+            queryset = queryset.filter(self.get_cursor_filter(queryset.model, cursor))
+        # One extra record shows whether there is a next page.
+        records = list(queryset[:self.per_page + 1])
+        next_cursor = None
+        if len(records) > self.per_page:
+            records = records[:self.per_page]
+            last = records[-1]
+            next_cursor = self.encode_cursor([last[self.field], last[self.key_field]])
+        return records, next_cursor
@@ -0,0 +1,90 @@
+from collections import defaultdict
+
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db.models import Q, QuerySet
+
+from movies.models import GenreFilmWork, PersonFilmWork
+
+
+class MoviesQuery:
+    """Strategy of loading genres and persons of films for the API.
+
+    Args:
+        roles: {result field name: role of persons}
+        with_genres: whether to add the "genres" field
+    """
+
+    def __init__(self, roles: dict[str, str], with_genres: bool = True):
+        self.roles = roles
+        self.with_genres = with_genres
+
+    def annotate(self, queryset: QuerySet) -> QuerySet:
+        """Prepare the queryset of film values."""
+        return queryset
+
+    def complete(self, records: list[dict]) -> list[dict]:
+        """Add related fields to the fetched film values."""
+        return records
+
+
+class AggregateMoviesQuery(MoviesQuery):
+    """One query: films are joined with genres and persons and aggregated by ArrayAgg."""
+
+    def annotate(self, queryset: QuerySet) -> QuerySet:
+        annotations = {
+            field_name: ArrayAgg("persons__full_name", distinct=True, filter=Q(personfilmwork__role=role))
+            for field_name, role in self.roles.items()
+        }
+        if self.with_genres:
+            annotations["genres"] = ArrayAgg("genres__name", distinct=True)
+        return queryset.annotate(**annotations) if annotations else queryset
+
+
+class PrefetchMoviesQuery(MoviesQuery):
+    """Films are fetched without joins, then genres and persons are loaded for the fetched ids.
+
+    Avoids the row explosion of film × genres × persons before the aggregation for films with large casts.
+
+    Args:
+        with_person_ids: persons are {"id", "full_name"} objects instead of names, to tell apart namesakes
+    """
+
+    def __init__(self, roles: dict[str, str], with_genres: bool = True, with_person_ids: bool = False):
+        super().__init__(roles, with_genres)
+        self.with_person_ids = with_person_ids
+
+    def complete(self, records: list[dict]) -> list[dict]:
+        if not records:
+            return records
+        ids = [record["id"] for record in records]
+        related = defaultdict(set)
+        if self.with_genres:
+            for film_work_id, name in GenreFilmWork.objects.filter(film_work_id__in=ids).values_list(
+                "film_work_id", "genre__name"
+            ):
+                related[(film_work_id, "genres")].add(name)
+        if self.roles:
+            field_names = {role: field_name for field_name, role in self.roles.items()}
+            for film_work_id, role, full_name, person_id in PersonFilmWork.objects.filter(
+                film_work_id__in=ids, role__in=field_names
+            ).values_list("film_work_id", "role", "person__full_name", "person_id"):
+                related[(film_work_id, field_names[role])].add(
+                    (full_name, person_id) if self.with_person_ids else full_name
+                )
+        related_fields = (["genres"] if self.with_genres else []) + list(self.roles)
+        for record in records:
+            for field_name in related_fields:
+                # Sorted as ArrayAgg(distinct=True) returns them.
+                record[field_name] = sorted(related.get((record["id"], field_name), ()))
+            if self.with_person_ids:
+                for field_name in self.roles:
+                    record[field_name] = [
+                        {"id": person_id, "full_name": full_name} for full_name, person_id in record[field_name]
+                    ]
+        return records
+
+
+MOVIES_QUERY_STRATEGIES = {
+    "aggregate": AggregateMoviesQuery,
+    "prefetch": PrefetchMoviesQuery,
+}
@@ -0,0 +1,33 @@
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONRenderer:
+    """Serialization of API responses by the standard json module, as JsonResponse does."""
+    content_type = "application/json"
+
+    def render(self, data) -> bytes:
+        return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+class OrjsonRenderer(JSONRenderer):
+    """Serialization by orjson. UUID and date are serialized natively, without Python-level default() calls."""
+
+    def render(self, data) -> bytes:
+        return orjson.dumps(data)
+
+
+def get_renderer() -> JSONRenderer:
+    """Renderer from the MOVIES_API_RENDERER setting. Falls back to JSONRenderer if orjson is not installed."""
+    renderer_class = import_string(settings.MOVIES_API_RENDERER)
+    if issubclass(renderer_class, OrjsonRenderer) and orjson is None:
+        renderer_class = JSONRenderer
+    return renderer_class()
@@ -0,0 +1,106 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from elasticsearch import ApiError, BadRequestError, Elasticsearch, TransportError
+
+from movies.api.v1.filters import MoviesFilter
+from movies.models import FilmWork
+
+
+class SearchUnavailable(Exception):
+    """Elasticsearch is not available or the index does not exist."""
+
+
+@lru_cache(maxsize=None)
+def get_elastic() -> Elasticsearch:
+    """Client of the movies index, one per process."""
+    return Elasticsearch(settings.MOVIES_SEARCH_ES_URL, request_timeout=settings.MOVIES_SEARCH_TIMEOUT)
+
+
+class MoviesSearch(MoviesFilter):
+    """Full-text search of films in the Elasticsearch index filled by postgres_to_es (config/es_movies.json).
+
+    Parameters are those of MoviesFilter and:
+        query - searched text, analyzed by the ru_en analyzer of the index fields; films are sorted
+            by relevance unless "sort" is given.
+    """
+    search_fields = ["title^3", "description", "actors_names", "director", "writers_names"]
+    # Result fields of the API: fields of the index documents.
+    index_fields = {
+        "id": "id",
+        "title": "title",
+        "description": "description",
+        "creation_date": "creation_date",
+        "rating": "imdb_rating",
+        "type": "type",
+        "genres": "genre",
+        "actors": "actors_names",
+        "directors": "director",
+        "writes": "writers_names",
+    }
+    list_fields = ("genres", "actors", "directors", "writes")
+    key_field = "id"
+
+    def get_query(self) -> dict:
+        filters = []
+        film_type = self.params.get("type")
+        if film_type:
+            if film_type not in FilmWork.Types.values:
+                raise BadRequest("Unknown type \"{}\"".format(film_type))
+            filters.append({"term": {"type": film_type}})
+        genre = self.params.get("genre")
+        if genre:
+            filters.append({"term": {"genre": genre}})
+        rating_range = {}
+        rating_min = self._get_float(self.params, "rating_min")
+        if rating_min is not None:
+            rating_range["gte"] = rating_min
+        rating_max = self._get_float(self.params, "rating_max")
+        if rating_max is not None:
+            rating_range["lte"] = rating_max
+        if rating_range:
+            filters.append({"range": {self.index_fields["rating"]: rating_range}})
+
+        text = self.params.get("query", "").strip()
+        must = [{"multi_match": {"query": text, "fields": self.search_fields}}] if text else []
+        return {"bool": {"must": must or [{"match_all": {}}], "filter": filters}}
+
+    def get_index_sort(self) -> list:
+        """Sort of the documents with the id as a tiebreaker for search_after."""
+        sort = self.get_sort()
+        if not sort:
+            return [{"_score": "desc"}, {self.key_field: "asc"}]
+        field = self.index_fields[sort.lstrip("-")]
+        return [
+            {field: {"order": "desc" if sort.startswith("-") else "asc", "missing": "_last"}},
+            {self.key_field: "asc"},
+        ]
+
+    def search(self, result_fields: list[str], size: int, search_after: list | None = None) -> dict:
+        """Response of Elasticsearch. Raises BadRequest for a cursor rejected by the index, SearchUnavailable
+        for other errors of Elasticsearch."""
+        try:
+            return get_elastic().search(
+                index=settings.MOVIES_SEARCH_INDEX,
+                query=self.get_query(),
+                sort=self.get_index_sort(),
+                size=size,
+                search_after=search_after,
+                source=[self.index_fields[field] for field in result_fields],
+                track_total_hits=True,
+            )
+        except BadRequestError as error:
+            if search_after is not None:
+                raise BadRequest("Invalid cursor")
+            raise SearchUnavailable(str(error))
+        except (ApiError, TransportError) as error:
+            raise SearchUnavailable(str(error))
+
+    def to_result(self, document: dict, result_fields: list[str]) -> dict:
+        """Result of the API from the index document, lists are sorted as in the Postgres-backed API."""
+        result = {}
+        for field in result_fields:
+            value = document.get(self.index_fields[field])
+            result[field] = sorted(value or []) if field in self.list_fields else value
+        return result
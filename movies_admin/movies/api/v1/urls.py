@@ -3,6 +3,10 @@ from django.urls import path
 from movies.api.v1 import views
 
 urlpatterns = [
+    path('movies/batch', views.MoviesBatchApi.as_view()),
+    path('movies/search/', views.MoviesSearchApi.as_view()),
+    # Django 4.1 iterates streaming responses in the event loop under ASGI, so the export is meant for uWSGI.
+    path('movies/export', views.MoviesExportApi.as_view()),
     path('movies/<uuid:pk>', views.MoviesDetailApi.as_view()),
     path('movies/', views.MoviesListApi.as_view())
 ]
@@ -1,10 +1,23 @@
-from django.db.models import Q
+import uuid
+
 from django.conf import settings
-from django.http import JsonResponse
-from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.exceptions import BadRequest
+from django.db import connections
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views.generic import View
 from django.views.generic.list import BaseListView
 from django.views.generic.detail import BaseDetailView
 
+from movies.api.v1.cache import CachedResponseMixin
+from movies.api.v1.counts import count_provider
+from movies.api.v1.filters import MoviesFilter
+from movies.api.v1.pagination import CountedPaginator, KeysetPaginator
+from movies.api.v1.queries import MOVIES_QUERY_STRATEGIES, MoviesQuery
+from movies.api.v1.renderers import JSONRenderer, get_renderer
+from movies.api.v1.search import MoviesSearch, SearchUnavailable
+from movies.metrics import timing
 from movies.models import FilmWork, PersonFilmWork
 
 
@@ -24,22 +37,110 @@ class MoviesApiMixin:
         "directors": PersonFilmWork.Roles.DIRECTOR,
         "writes": PersonFilmWork.Roles.WRITER,
     }
+    query_strategy = settings.MOVIES_QUERY_STRATEGY
+
+    def get_result_fields(self) -> list[str]:
+        """Fields of the result, can be limited by the "fields" parameter (sparse fieldset).
+
+        The id is always returned.
+        """
+        all_fields = self.movies_simple_fields_in_result + ["genres"] + list(self.movies_roles_in_result)
+        fields_param = self.request.GET.get("fields")
+        if not fields_param:
+            return all_fields
+        fields = {field.strip() for field in fields_param.split(",") if field.strip()}
+        unknown_fields = fields.difference(all_fields)
+        if unknown_fields:
+            raise BadRequest("Unknown fields: {}".format(", ".join(sorted(unknown_fields))))
+        return [field for field in all_fields if field in fields or field == "id"]
+
+    def get_values_fields(self) -> list[str]:
+        """Fields of the film table in the query."""
+        result_fields = self.get_result_fields()
+        return [field for field in self.movies_simple_fields_in_result if field in result_fields]
+
+    def get_movies_query(self) -> MoviesQuery:
+        """Strategy of loading genres and persons, see movies.api.v1.queries. Only requested fields are loaded."""
+        result_fields = self.get_result_fields()
+        roles = {field: role for field, role in self.movies_roles_in_result.items() if field in result_fields}
+        return MOVIES_QUERY_STRATEGIES[self.query_strategy](roles, with_genres="genres" in result_fields)
+
+    def get_base_queryset(self):
+        """Films without aggregated fields, e.g. for counting."""
+        return super().get_queryset()
 
     def get_queryset(self):
-        queryset = super().get_queryset().values(*self.movies_simple_fields_in_result)
-        return queryset.annotate(genres=ArrayAgg("genres__name", distinct=True), **{
-            field_name: ArrayAgg("persons__full_name", distinct=True, filter=Q(personfilmwork__role=role))
-            for field_name, role in self.movies_roles_in_result.items()
-        })
+        queryset = self.get_base_queryset().values(*self.get_values_fields())
+        return self.get_movies_query().annotate(queryset)
+
+    def get_results(self, records) -> list[dict]:
+        """Fetch the films and complete them with related fields."""
+        results = self.get_movies_query().complete(list(records))
+        result_fields = self.get_result_fields()
+        for record in results:
+            # Fields added only for sorting are removed.
+            for field in [field for field in record if field not in result_fields]:
+                del record[field]
+        return results
 
     def render_to_response(self, context, **response_kwargs):
-        return JsonResponse(context)
+        renderer = get_renderer()
+        with timing(self.request, "serialize"):
+            content = renderer.render(context)
+        return HttpResponse(content, content_type=renderer.content_type, **response_kwargs)
 
 
-class MoviesListApi(MoviesApiMixin, BaseListView):
+class MoviesListApi(CachedResponseMixin, MoviesApiMixin, BaseListView):
     paginate_by = settings.MOVIES_PAGE_SIZE
+    cursor_sort_field = settings.MOVIES_CURSOR_SORT_FIELD
+
+    def get_sort_field(self) -> str | None:
+        return MoviesFilter(self.request.GET).get_sort()
+
+    def get_base_queryset(self):
+        return MoviesFilter(self.request.GET).filter(super().get_base_queryset())
+
+    def get_values_fields(self) -> list[str]:
+        # The sort field is needed for the cursor of the next page.
+        fields = super().get_values_fields()
+        sort_field = (self.get_sort_field() or self.cursor_sort_field).lstrip("-")
+        return fields if sort_field in fields else fields + [sort_field]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        sort_field = self.get_sort_field()
+        if sort_field:
+            queryset = queryset.order_by(*KeysetPaginator(sort_field, self.paginate_by).get_ordering())
+        return queryset
+
+    def get_count(self) -> int:
+        # Aggregates don't change the number of films, so films are counted without them.
+        return count_provider.count(self.get_base_queryset())
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        return CountedPaginator(queryset, per_page, self.get_count, orphans=orphans,
+                                allow_empty_first_page=allow_empty_first_page, **kwargs)
+
+    def is_cursor_pagination(self) -> bool:
+        return "cursor" in self.request.GET or self.request.GET.get("pagination") == "cursor"
+
+    def get_cursor_context_data(self):
+        """Cursor pagination: "next" is the cursor of the next page, "prev" is not supported."""
+        paginator = KeysetPaginator(self.get_sort_field() or self.cursor_sort_field, self.paginate_by)
+        results, next_cursor = paginator.paginate(self.get_queryset(), self.request.GET.get("cursor"))
+        results = self.get_results(results)
+        count = self.get_count()
+        return {
+            "count": count,
+            "total_pages": -(-count // self.paginate_by),
+            "prev": None,
+            "next": next_cursor,
+            "results": results,
+        }
 
     def get_context_data(self, *, object_list=None, **kwargs):
+        if self.is_cursor_pagination():
+            return self.get_cursor_context_data()
         paginator, page, queryset, is_paginated = self.paginate_queryset(self.get_queryset(), self.paginate_by)
 
         context = {
@@ -47,11 +148,151 @@ class MoviesListApi(MoviesApiMixin, BaseListView):
             "total_pages": paginator.num_pages,
             "prev": page.previous_page_number() if page.has_previous() else None,
             "next": page.next_page_number() if page.has_next() else None,
-            "results": list(queryset),
+            "results": self.get_results(queryset),
         }
         return context
 
 
-class MoviesDetailApi(MoviesApiMixin, BaseDetailView):
+class MoviesDetailApi(CachedResponseMixin, MoviesApiMixin, BaseDetailView):
     def get_context_data(self, **kwargs):
-        return self.object
+        return self.get_results([self.object])[0]
+
+
+class MoviesBatchApi(CachedResponseMixin, MoviesApiMixin, BaseListView):
+    """Films by the list of ids (?ids=id1,id2,...) in one query, in the order of the request."""
+    max_ids = settings.MOVIES_BATCH_MAX_IDS
+
+    def get_ids(self) -> list[uuid.UUID]:
+        ids = []
+        for value in self.request.GET.get("ids", "").split(","):
+            if not value.strip():
+                continue
+            try:
+                film_id = uuid.UUID(value.strip())
+            except ValueError:
+                raise BadRequest("Invalid id \"{}\"".format(value))
+            if film_id not in ids:
+                ids.append(film_id)
+        if not ids:
+            raise BadRequest("Parameter \"ids\" is required")
+        if len(ids) > self.max_ids:
+            raise BadRequest("No more than {} ids are allowed".format(self.max_ids))
+        return ids
+
+    def get_context_data(self, *, object_list=None, **kwargs):
+        ids = self.get_ids()
+        records = {record["id"]: record for record in self.get_results(self.get_queryset().filter(id__in=ids))}
+        return {
+            "results": [records[film_id] for film_id in ids if film_id in records],
+            "missing": [film_id for film_id in ids if film_id not in records],
+        }
+
+
+class MoviesSearchApi(CachedResponseMixin, MoviesApiMixin, View):
+    """Full-text search of films in Elasticsearch (see movies.api.v1.search) with the result of the list API.
+
+    Pages are selected by search_after: "next" is the cursor of the next page for the "cursor" parameter.
+    If Elasticsearch is not available, the response is 503.
+    """
+    paginate_by = settings.MOVIES_PAGE_SIZE
+
+    def get(self, request, *args, **kwargs):
+        search = MoviesSearch(request.GET)
+        cursor = request.GET.get("cursor")
+        search_after = KeysetPaginator.decode_cursor(cursor) if cursor else None
+        result_fields = self.get_result_fields()
+        try:
+            # One extra hit shows whether there is a next page.
+            response = search.search(result_fields, self.paginate_by + 1, search_after)
+        except SearchUnavailable:
+            return self.render_to_response({"detail": "Search is temporarily unavailable"}, status=503)
+        count = response["hits"]["total"]["value"]
+        hits = response["hits"]["hits"]
+        next_cursor = None
+        if len(hits) > self.paginate_by:
+            hits = hits[:self.paginate_by]
+            next_cursor = KeysetPaginator.encode_cursor(hits[-1]["sort"])
+        return self.render_to_response({
+            "count": count,
+            "total_pages": -(-count // self.paginate_by),
+            "prev": None,
+            "next": next_cursor,
+            "results": [search.to_result(hit["_source"], result_fields) for hit in hits],
+        })
+
+
+class MoviesExportApi(MoviesApiMixin, BaseListView):
+    """Streaming export of all films in NDJSON, ordered by (modified, id).
+
+    Films are read through a server-side cursor (by keyset pages if server-side cursors are disabled) and
+    completed with genres and persons in chunks, so memory does not depend on the size of the catalog. Parameters:
+        modified_since - export only films modified since this time (ISO 8601, TIME_ZONE if without the
+            offset), for incremental exports;
+        resume - "resume_token" of the last received film, to continue an interrupted export;
+        fields - sparse fieldset, as in the list API.
+    """
+    chunk_size = settings.MOVIES_EXPORT_CHUNK_SIZE
+    # Joins with aggregation can't be streamed, so genres and persons are loaded for each chunk.
+    query_strategy = "prefetch"
+    export_sort_field = "modified"
+
+    def get_values_fields(self) -> list[str]:
+        return super().get_values_fields() + [self.export_sort_field]
+
+    def get_keyset(self) -> KeysetPaginator:
+        return KeysetPaginator(self.export_sort_field, self.chunk_size)
+
+    def get_queryset(self):
+        keyset = self.get_keyset()
+        queryset = super().get_queryset().order_by(*keyset.get_ordering())
+        modified_since = self.request.GET.get("modified_since")
+        if modified_since:
+            try:
+                modified_since_value = parse_datetime(modified_since)
+            except ValueError:
+                # Well formatted, but not a valid datetime, e.g. the 13th month.
+                modified_since_value = None
+            if modified_since_value is None:
+                raise BadRequest("Parameter \"modified_since\" must be a datetime in ISO 8601")
+            if timezone.is_naive(modified_since_value):
+                modified_since_value = timezone.make_aware(modified_since_value)
+            queryset = queryset.filter(modified__gte=modified_since_value)
+        resume = self.request.GET.get("resume")
+        if resume:
+            queryset = queryset.filter(keyset.get_cursor_filter(queryset.model, resume))
+        return queryset
+
+    def render_chunk(self, records: list[dict], renderer: JSONRenderer):
+        keyset = self.get_keyset()
+        tokens = [keyset.encode_cursor([record[keyset.field], record[keyset.key_field]]) for record in records]
+        for record, token in zip(self.get_results(records), tokens):
+            record["resume_token"] = token
+            yield renderer.render(record) + b"\n"
+
+    def iter_records(self, queryset):
+        if not connections[queryset.db].settings_dict["DISABLE_SERVER_SIDE_CURSORS"]:
+            yield from queryset.iterator(chunk_size=self.chunk_size)
+            return
+        # Behind pgbouncer in transaction mode a cursor does not outlive the transaction, so films are read by pages.
+        keyset = self.get_keyset()
+        cursor = None
+        while True:
+            records, cursor = keyset.paginate(queryset, cursor)
+            yield from records
+            if cursor is None:
+                break
+
+    def iter_lines(self, queryset):
+        renderer = get_renderer()
+        chunk = []
+        for record in self.iter_records(queryset):
+            chunk.append(record)
+            if len(chunk) >= self.chunk_size:
+                yield from self.render_chunk(chunk, renderer)
+                chunk = []
+        if chunk:
+            yield from self.render_chunk(chunk, renderer)
+
+    def get(self, request, *args, **kwargs):
+        # The queryset is built before streaming, so invalid parameters get 400.
+        return StreamingHttpResponse(self.iter_lines(self.get_queryset()), content_type="application/x-ndjson")
@@ -0,0 +1,44 @@
+"""Format of the catalog files of the import_movies and export_movies commands.
+
+A film is a record of the movies API: the fields of the film, names of its genres and persons by roles
+(actors, directors, writes). NDJSON has one record per line, CSV has the items of a list field separated
+by LIST_SEPARATOR.
+
+Persons with the same name are told apart by id: in NDJSON a person is an object {"id": ..., "full_name": ...},
+in CSV "<id>:<full name>" (see parse_person). export_movies always writes the ids, import_movies also accepts
+bare names.
+"""
+import uuid
+
+from movies.api.v1.views import MoviesApiMixin
+
+FORMATS = ("ndjson", "csv")
+LIST_SEPARATOR = "|"
+SIMPLE_FIELDS = MoviesApiMixin.movies_simple_fields_in_result
+ROLES = MoviesApiMixin.movies_roles_in_result
+LIST_FIELDS = ["genres"] + list(ROLES)
+FIELDS = SIMPLE_FIELDS + LIST_FIELDS
+
+
+PERSON_ID_SEPARATOR = ":"
+
+
+def detect_format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def parse_person(item) -> tuple[uuid.UUID | None, str]:
+    """Id (None if the file has only the name) and full name of a person of a record.
+
+    Raises ValueError for an invalid id.
+    """
+    if isinstance(item, dict):
+        person_id = item.get("id")
+        return (uuid.UUID(str(person_id)) if person_id else None), item.get("full_name") or ""
+    prefix, separator, name = item.partition(PERSON_ID_SEPARATOR)
+    if separator:
+        try:
+            return uuid.UUID(prefix), name
+        except ValueError:
+            pass
+    return None, item
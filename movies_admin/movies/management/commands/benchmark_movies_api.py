@@ -0,0 +1,220 @@
+import json
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from time import perf_counter, sleep
+from unittest import mock
+from urllib.request import urlopen
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from movies.api.v1.cache import CachedResponseMixin
+from movies.api.v1.counts import count_provider
+from movies.models import FilmWork, Genre, GenreFilmWork, Person, PersonFilmWork
+
+from .loadtest_movies_api import Command as LoadTestCommand
+
+GENRES_COUNT = 30
+GENRES_PER_FILM = 2
+PERSONS_PER_FILM = 10
+# Tracked metrics: a larger value is a regression.
+TRACKED_METRICS = ("p50_ms", "p95_ms", "p99_ms", "queries")
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark of the movies API: list (first and deep page), detail and count paths through the Django test "
+        "client or a real uWSGI process. Reports p50/p95/p99 latency, queries per request and throughput, "
+        "compares them with a baseline and fails if a metric regressed more than the threshold. Films are "
+        "counted in the exact mode, so the count path measures COUNT and not the cache of counts. "
+        "Run it on a local benchmark database: --seed-films adds a synthetic catalog."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed-films", type=int, default=0, help="add a synthetic catalog of this size first")
+        parser.add_argument("--client", choices=("test", "uwsgi"), default="test", help="how requests are sent")
+        parser.add_argument("--requests", type=int, default=200, help="number of requests for each path")
+        parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients for uWSGI")
+        parser.add_argument("--uwsgi-processes", type=int, default=2)
+        parser.add_argument("--uwsgi-threads", type=int, default=4)
+        parser.add_argument("--cache", action="store_true", help="keep the response cache of the API enabled")
+        parser.add_argument("--output", help="file to write the results in JSON")
+        parser.add_argument("--baseline", help="results of a previous run to compare with")
+        parser.add_argument("--threshold", type=float, default=0.2,
+                            help="allowed relative growth of latency and queries compared to the baseline")
+
+    @staticmethod
+    def seed_catalog(films_count: int, batch_size: int = 2000):
+        """Films with genres and persons in the proportions of the production catalog."""
+        rnd = random.Random(0)
+        # Names of genres are unique, the suffix tells apart the genres of several runs.
+        suffix = uuid4().hex
+        genres = Genre.objects.bulk_create(
+            [Genre(name="Benchmark genre {} {}".format(suffix, number)) for number in range(GENRES_COUNT)]
+        )
+        roles = list(PersonFilmWork.Roles.values)
+        for offset in range(0, films_count, batch_size):
+            size = min(batch_size, films_count - offset)
+            films = FilmWork.objects.bulk_create([
+                FilmWork(
+                    title="Benchmark film {}".format(offset + number),
+                    description="Description of the benchmark film {}. ".format(offset + number) * 5,
+                    creation_date=date(1950, 1, 1) + timedelta(days=rnd.randrange(25000)),
+                    rating=round(rnd.uniform(0, 10), 1),
+                    type=rnd.choice(FilmWork.Types.values),
+                )
+                for number in range(size)
+            ])
+            persons = Person.objects.bulk_create(
+                [Person(full_name="Benchmark person {}".format(offset + number)) for number in range(size)]
+            )
+            GenreFilmWork.objects.bulk_create([
+                GenreFilmWork(film_work=film, genre=genre)
+                for film in films for genre in rnd.sample(genres, GENRES_PER_FILM)
+            ])
+            PersonFilmWork.objects.bulk_create([
+                PersonFilmWork(film_work=film, person=person, role=rnd.choice(roles))
+                for film in films for person in rnd.sample(persons, min(PERSONS_PER_FILM, size))
+            ], ignore_conflicts=True)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    @staticmethod
+    def get_paths() -> dict[str, str]:
+        films_count = FilmWork.objects.count()
+        if not films_count:
+            raise CommandError("There are no films, use --seed-films")
+        last_page = max(1, -(-films_count // settings.MOVIES_PAGE_SIZE))
+        film_id = FilmWork.objects.values_list("id", flat=True).first()
+        return {
+            "list_first_page": "/api/v1/movies/",
+            "list_deep_page": "/api/v1/movies/?page={}".format(last_page),
+            "detail": "/api/v1/movies/{}".format(film_id),
+            # A filtered list is counted by COUNT, not taken from the statistics.
+            "count": "/api/v1/movies/?type={}&fields=id".format(FilmWork.Types.MOVIE),
+        }
+
+    @staticmethod
+    def summarize(latencies: list[float], queries: list[int], seconds: float) -> dict:
+        latencies = [latency * 1000 for latency in latencies]
+        return {
+            "p50_ms": round(LoadTestCommand.percentile(latencies, 50), 2),
+            "p95_ms": round(LoadTestCommand.percentile(latencies, 95), 2),
+            "p99_ms": round(LoadTestCommand.percentile(latencies, 99), 2),
+            "queries": max(queries),
+            "requests_per_second": round(len(latencies) / seconds, 1),
+        }
+
+    def run_test_client(self, path: str, requests: int) -> dict:
+        client = Client()
+        latencies, queries = [], []
+        start = perf_counter()
+        for _ in range(requests):
+            with CaptureQueriesContext(connection) as captured:
+                request_start = perf_counter()
+                response = client.get(path)
+                latencies.append(perf_counter() - request_start)
+            if response.status_code != 200:
+                raise CommandError("{} returned {}".format(path, response.status_code))
+            queries.append(len(captured))
+        return self.summarize(latencies, queries, perf_counter() - start)
+
+    @staticmethod
+    def fetch(url: str) -> tuple[float, int]:
+        """Latency and number of queries from the Server-Timing header (movies.metrics)."""
+        start = perf_counter()
+        with urlopen(url, timeout=60) as response:
+            response.read()
+            server_timing = response.headers.get("Server-Timing", "")
+        match = re.search(r'desc="(\d+) queries"', server_timing)
+        if match is None:
+            # Without the number of queries regressions of queries would not be detected.
+            raise CommandError("No number of queries in the Server-Timing header of {}, is the path in "
+                               "MOVIES_METRICS_PATHS?".format(url))
+        return perf_counter() - start, int(match.group(1))
+
+    def run_uwsgi(self, base_url: str, path: str, requests: int, concurrency: int) -> dict:
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(self.fetch, [base_url + path] * requests))
+        return self.summarize([latency for latency, _ in results], [count for _, count in results],
+                              perf_counter() - start)
+
+    @staticmethod
+    def start_uwsgi(processes: int, threads: int, cache: bool) -> tuple[subprocess.Popen, str]:
+        if shutil.which("uwsgi") is None:
+            raise CommandError("uwsgi is not installed")
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        env = dict(os.environ, MOVIES_API_CACHE_ENABLED=str(cache), MOVIES_COUNT_MODE="exact",
+                   DJANGO_ALLOWED_HOSTS="127.0.0.1")
+        process = subprocess.Popen(
+            ["uwsgi", "--http", "127.0.0.1:{}".format(port), "--module", "config.wsgi", "--master",
+             "--processes", str(processes), "--threads", str(threads), "--lazy-apps", "--need-app",
+             "--disable-logging"],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        base_url = "http://127.0.0.1:{}".format(port)
+        for _ in range(100):
+            try:
+                urlopen(base_url + "/api/v1/movies/?fields=id", timeout=5).read()
+                return process, base_url
+            except OSError:
+                sleep(0.2)
+        process.terminate()
+        raise CommandError("uWSGI did not start")
+
+    def compare(self, results: dict, baseline: dict, threshold: float) -> list[str]:
+        regressions = []
+        for name, metrics in results.items():
+            for metric in TRACKED_METRICS:
+                old, new = baseline.get(name, {}).get(metric), metrics.get(metric)
+                if old is not None and new is not None and new > old * (1 + threshold):
+                    regressions.append("{} {}: {} -> {}".format(name, metric, old, new))
+        return regressions
+
+    def handle(self, *args, **options):
+        if options["seed_films"]:
+            self.seed_catalog(options["seed_films"])
+        paths = self.get_paths()
+        results = {}
+        if options["client"] == "uwsgi":
+            process, base_url = self.start_uwsgi(options["uwsgi_processes"], options["uwsgi_threads"],
+                                                 options["cache"])
+            try:
+                for name, path in paths.items():
+                    results[name] = self.run_uwsgi(base_url, path, options["requests"], options["concurrency"])
+            finally:
+                process.terminate()
+                process.wait()
+        else:
+            with (mock.patch.object(CachedResponseMixin, "cache_responses", options["cache"]),
+                  mock.patch.object(count_provider, "mode", "exact"),
+                  override_settings(ALLOWED_HOSTS=["testserver"])):
+                for name, path in paths.items():
+                    results[name] = self.run_test_client(path, options["requests"])
+
+        self.stdout.write("{:<16} {:>9} {:>9} {:>9} {:>8} {:>10}".format(
+            "path", "p50, ms", "p95, ms", "p99, ms", "queries", "requests/s"))
+        for name, metrics in results.items():
+            self.stdout.write("{:<16} {p50_ms:>9} {p95_ms:>9} {p99_ms:>9} {queries:>8} {requests_per_second:>10}"
+                              .format(name, **metrics))
+        if options["output"]:
+            Path(options["output"]).write_text(json.dumps(results, indent=2))
+        if options["baseline"]:
+            regressions = self.compare(results, json.loads(Path(options["baseline"]).read_text()),
+                                       options["threshold"])
+            if regressions:
+                raise CommandError("Regressions:\n" + "\n".join(regressions))
@@ -0,0 +1,52 @@
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+
+from movies.api.v1.queries import MOVIES_QUERY_STRATEGIES
+from movies.api.v1.views import MoviesApiMixin
+from movies.models import FilmWork
+
+
+class Command(BaseCommand):
+    help = "Compares the latency of the query strategies of the movies API on the films with the largest casts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--films", type=int, default=50, help="number of films with the largest casts")
+        parser.add_argument("--repeat", type=int, default=20, help="number of runs for each strategy")
+
+    @staticmethod
+    def run_strategy(strategy_name: str, ids: list, single: bool) -> tuple[float, int]:
+        """Load the films by the strategy. Returns seconds and number of queries."""
+        movies_query = MOVIES_QUERY_STRATEGIES[strategy_name](MoviesApiMixin.movies_roles_in_result)
+        queryset = FilmWork.objects.values(*MoviesApiMixin.movies_simple_fields_in_result)
+        with CaptureQueriesContext(connection) as queries:
+            start = perf_counter()
+            if single:
+                for film_id in ids:
+                    movies_query.complete(list(movies_query.annotate(queryset.filter(pk=film_id))))
+            else:
+                movies_query.complete(list(movies_query.annotate(queryset.filter(pk__in=ids))))
+            seconds = perf_counter() - start
+        return seconds, len(queries)
+
+    def handle(self, *args, **options):
+        ids = list(
+            FilmWork.objects.annotate(cast_size=Count("personfilmwork"))
+            .order_by("-cast_size")
+            .values_list("id", flat=True)[:options["films"]]
+        )
+        if not ids:
+            self.stdout.write("There are no films.")
+            return
+        self.stdout.write("{:<10} {:<8} {:>12} {:>12} {:>8}".format("strategy", "mode", "median, ms", "max, ms",
+                                                                    "queries"))
+        for single, mode in ((False, "page"), (True, "detail")):
+            for strategy_name in MOVIES_QUERY_STRATEGIES:
+                runs = [self.run_strategy(strategy_name, ids, single) for _ in range(options["repeat"])]
+                timings = [seconds * 1000 for seconds, _ in runs]
+                self.stdout.write("{:<10} {:<8} {:>12.2f} {:>12.2f} {:>8}".format(
+                    strategy_name, mode, median(timings), max(timings), runs[0][1]))
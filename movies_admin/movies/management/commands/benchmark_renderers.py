@@ -0,0 +1,47 @@
+import uuid
+from datetime import date
+from timeit import repeat
+
+from django.core.management.base import BaseCommand
+
+from movies.api.v1.renderers import JSONRenderer, OrjsonRenderer, orjson
+
+
+class Command(BaseCommand):
+    help = "Compares the speed of JSON renderers of the movies API on a synthetic page of films."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=50, help="number of films on the page")
+        parser.add_argument("--cast-size", type=int, default=100, help="number of actors of each film")
+        parser.add_argument("--number", type=int, default=200, help="number of renderings in one run")
+
+    @staticmethod
+    def make_page(page_size: int, cast_size: int) -> dict:
+        results = [
+            {
+                "id": uuid.uuid4(),
+                "title": "Film {}".format(number),
+                "description": "Description of the film {}".format(number) * 10,
+                "creation_date": date(2000, 1, 1),
+                "rating": 7.5,
+                "type": "movie",
+                "genres": ["Drama", "Comedy", "Action"],
+                "actors": ["Actor {}".format(actor) for actor in range(cast_size)],
+                "directors": ["Director {}".format(number)],
+                "writes": ["Writer {}".format(number), "Writer {}".format(number + 1)],
+            }
+            for number in range(page_size)
+        ]
+        return {"count": 10000, "total_pages": 200, "prev": None, "next": 2, "results": results}
+
+    def handle(self, *args, **options):
+        page = self.make_page(options["page_size"], options["cast_size"])
+        renderers = [JSONRenderer()]
+        if orjson is not None:
+            renderers.append(OrjsonRenderer())
+        else:
+            self.stdout.write("orjson is not installed, OrjsonRenderer is skipped.")
+        for renderer in renderers:
+            timings = repeat(lambda: renderer.render(page), number=options["number"], repeat=5)
+            self.stdout.write("{:<16} {:>10.3f} ms per page, {} bytes".format(
+                type(renderer).__name__, min(timings) / options["number"] * 1000, len(renderer.render(page))))
@@ -0,0 +1,39 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+
+class Command(BaseCommand):
+    help = (
+        "Shows PostgresSQL connections of the application per worker process (by application_name) "
+        "and compares their possible number with max_connections."
+    )
+
+    def handle(self, *args, **options):
+        application_name = connection.settings_dict["OPTIONS"]["application_name"]
+        prefix = application_name.rsplit(":", 1)[0] + ":"
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT application_name, state, COUNT(*) FROM pg_stat_activity "
+                "WHERE application_name LIKE %s AND application_name <> %s "
+                "GROUP BY application_name, state ORDER BY application_name, state",
+                [prefix + "%", application_name],
+            )
+            rows = cursor.fetchall()
+            cursor.execute("SHOW max_connections")
+            max_connections = int(cursor.fetchone()[0])
+
+        if settings.DB_POOL_MODE == "pgbouncer":
+            self.stdout.write("Connections go through pgbouncer, see SHOW CLIENTS in its admin console.")
+        total = 0
+        for name, state, count in rows:
+            self.stdout.write("{:<24} {:<20} {:>5}".format(name, state or "-", count))
+            total += count
+        # uWSGI worker keeps a connection per thread (see Dockerfile and uwsgi.ini).
+        workers_limit = int(os.environ.get("UWSGI_PROCESSES", 1)) * int(os.environ.get("UWSGI_THREADS", 1))
+        self.stdout.write("Open connections: {}, possible for uWSGI workers: {}, max_connections: {}".format(
+            total, workers_limit, max_connections))
+        if workers_limit > max_connections:
+            self.stderr.write("max_connections is less than the number of threads of uWSGI workers.")
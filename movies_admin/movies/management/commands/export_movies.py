@@ -0,0 +1,80 @@
+import csv
+import sys
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from movies.api.v1.pagination import KeysetPaginator
+from movies.api.v1.queries import PrefetchMoviesQuery
+from movies.api.v1.renderers import get_renderer
+from movies.models import FilmWork
+
+from ._catalog import (
+    FIELDS, FORMATS, LIST_FIELDS, LIST_SEPARATOR, PERSON_ID_SEPARATOR, ROLES, SIMPLE_FIELDS, detect_format,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Exports all films with genres and persons to CSV or NDJSON. Persons are written with their ids, so "
+        "import_movies links namesakes correctly. Films are read through a server-side cursor (by keyset pages if "
+        "server-side cursors are disabled) and completed with genres and persons in batches, so memory does not "
+        "depend on the size of the catalog."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="output file, \"-\" for stdout")
+        parser.add_argument("--format", choices=FORMATS, help="by default by the extension of the file")
+        parser.add_argument("--batch-size", type=int, default=2000, help="number of films read at a time")
+
+    @staticmethod
+    def iter_films(batch_size: int):
+        queryset = FilmWork.objects.order_by("id").values(*SIMPLE_FIELDS)
+        if not connection.settings_dict["DISABLE_SERVER_SIDE_CURSORS"]:
+            yield from queryset.iterator(chunk_size=batch_size)
+            return
+        # Behind pgbouncer in transaction mode a cursor does not outlive the transaction, so films are read by pages.
+        keyset = KeysetPaginator("id", batch_size)
+        cursor = None
+        while True:
+            records, cursor = keyset.paginate(queryset, cursor)
+            yield from records
+            if cursor is None:
+                break
+
+    def iter_records(self, batch_size: int):
+        query = PrefetchMoviesQuery(ROLES, with_person_ids=True)
+        records = self.iter_films(batch_size)
+        while batch := list(islice(records, batch_size)):
+            yield from query.complete(batch)
+
+    @staticmethod
+    def format_csv_item(item) -> str:
+        if isinstance(item, dict):
+            return "{}{}{}".format(item["id"], PERSON_ID_SEPARATOR, item["full_name"])
+        return item
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or detect_format(path)
+        fp = sys.stdout if path == "-" else open(path, "w", newline="")
+        count = 0
+        try:
+            if file_format == "csv":
+                writer = csv.DictWriter(fp, fieldnames=FIELDS)
+                writer.writeheader()
+                for record in self.iter_records(options["batch_size"]):
+                    for field in LIST_FIELDS:
+                        record[field] = LIST_SEPARATOR.join(self.format_csv_item(item) for item in record[field])
+                    writer.writerow(record)
+                    count += 1
+            else:
+                renderer = get_renderer()
+                for record in self.iter_records(options["batch_size"]):
+                    fp.write(renderer.render(record).decode() + "\n")
+                    count += 1
+        finally:
+            if fp is not sys.stdout:
+                fp.close()
+        self.stderr.write("Exported {} films".format(count))
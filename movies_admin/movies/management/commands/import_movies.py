@@ -0,0 +1,195 @@
+import csv
+import json
+import sys
+import uuid
+from collections import defaultdict
+from itertools import islice
+from time import perf_counter
+
+from django.core.exceptions import ValidationError
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from movies.api.v1.cache import response_cache
+from movies.api.v1.counts import CountProvider
+from movies.models import FilmWork, Genre, GenreFilmWork, Person, PersonFilmWork
+
+from ._catalog import FORMATS, LIST_FIELDS, LIST_SEPARATOR, ROLES, SIMPLE_FIELDS, detect_format, parse_person
+
+
+class NameLookup:
+    """Ids of genres or persons by name, missing ones are created. Names are cached for the whole import.
+
+    Names of several objects (persons are not unique by name) are ambiguous and are not resolved.
+    """
+
+    def __init__(self, model, field: str, batch_size: int):
+        self.model = model
+        self.field = field
+        self.batch_size = batch_size
+        self.ids = {}
+        self.ambiguous = set()
+        self.known_ids = set()
+
+    def resolve(self, names: set[str]) -> dict:
+        missing = names.difference(self.ids, self.ambiguous)
+        if missing:
+            found = defaultdict(list)
+            for name, pk in self.model.objects.filter(**{self.field + "__in": missing}).values_list(self.field, "id"):
+                found[name].append(pk)
+            for name, pks in found.items():
+                if len(pks) > 1:
+                    self.ambiguous.add(name)
+                else:
+                    self.ids[name] = pks[0]
+            created = [self.model(**{self.field: name}) for name in missing if name not in found]
+            self.model.objects.bulk_create(created, batch_size=self.batch_size)
+            for obj in created:
+                self.ids[getattr(obj, self.field)] = obj.id
+        return self.ids
+
+    def ensure_ids(self, names_by_id: dict):
+        """Create the objects given by id in the file that are not in the database."""
+        missing = set(names_by_id).difference(self.known_ids)
+        if missing:
+            existing = set(self.model.objects.filter(id__in=missing).values_list("id", flat=True))
+            self.model.objects.bulk_create(
+                [self.model(id=pk, **{self.field: names_by_id[pk]}) for pk in missing if pk not in existing],
+                batch_size=self.batch_size,
+            )
+            self.known_ids.update(missing)
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports films with genres and persons from CSV or NDJSON in the format of export_movies. "
+        "Films are inserted or updated by id with bulk_create in batches, one transaction per batch. "
+        "Genres are found by name, persons by id if the file has it, otherwise by name; missing ones are created. "
+        "Persons whose name belongs to several persons are not linked and are reported. The genres and the "
+        "persons of the imported roles of each film are replaced by the ones from the file. Caches of the API are "
+        "invalidated at the end, the web workers see it only with a shared cache (MOVIES_API_CACHE_BACKEND=redis)."
+    )
+    update_fields = [field for field in SIMPLE_FIELDS if field != "id"] + ["modified"]
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="input file, \"-\" for stdin")
+        parser.add_argument("--format", choices=FORMATS, help="by default by the extension of the file")
+        parser.add_argument("--batch-size", type=int, default=1000, help="number of films in a transaction")
+
+    @staticmethod
+    def read_records(fp, file_format: str):
+        if file_format == "csv":
+            for record in csv.DictReader(fp):
+                for field in LIST_FIELDS:
+                    record[field] = [name for name in (record.get(field) or "").split(LIST_SEPARATOR) if name]
+                yield {field: value if value != "" else None for field, value in record.items()}
+        else:
+            for line in fp:
+                if line.strip():
+                    yield json.loads(line)
+
+    @staticmethod
+    def make_film(number: int, record: dict) -> FilmWork:
+        values = {}
+        for field_name in SIMPLE_FIELDS:
+            field = FilmWork._meta.get_field(field_name)
+            try:
+                values[field_name] = field.to_python(record.get(field_name))
+            except ValidationError as error:
+                raise CommandError("Film {}, field \"{}\": {}".format(number, field_name, "; ".join(error.messages)))
+        values["id"] = values["id"] or uuid.uuid4()
+        if values["type"] not in FilmWork.Types.values:
+            raise CommandError("Film {}: unknown type \"{}\"".format(number, values["type"]))
+        return FilmWork(**values)
+
+    @staticmethod
+    def get_persons(number: int, record: dict) -> list[tuple[uuid.UUID | None, str, str]]:
+        """(id, full name, role) of the persons of the record."""
+        persons = []
+        for field, role in ROLES.items():
+            for item in record.get(field) or ():
+                try:
+                    person_id, name = parse_person(item)
+                    if not name:
+                        raise ValueError("empty name")
+                except (ValueError, TypeError, AttributeError):
+                    raise CommandError("Film {}, field \"{}\": invalid person {!r}".format(number, field, item))
+                persons.append((person_id, name, role))
+        return persons
+
+    @staticmethod
+    def delete_links(model, film_ids: list, extra_where: str = "", params: tuple = ()):
+        # Without the collector and signals of QuerySet.delete(), caches are invalidated once after the import
+        # (in all web workers only with a shared cache backend).
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM {} WHERE film_work_id = ANY(%s){}".format(
+                    connection.ops.quote_name(model._meta.db_table), extra_where),
+                (film_ids,) + params,
+            )
+
+    def import_batch(self, films: list[FilmWork], records: list[dict], persons: list[list[tuple]]):
+        film_ids = [film.id for film in films]
+        with transaction.atomic():
+            FilmWork.objects.bulk_create(
+                films, update_conflicts=True, unique_fields=["id"], update_fields=self.update_fields
+            )
+            genre_ids = self.genres.resolve({name for record in records for name in record.get("genres") or ()})
+            self.persons.ensure_ids({
+                person_id: name for film_persons in persons for person_id, name, _ in film_persons if person_id
+            })
+            person_ids = self.persons.resolve({
+                name for film_persons in persons for person_id, name, _ in film_persons if not person_id
+            })
+            links = []
+            for film, film_persons in zip(films, persons):
+                for person_id, name, role in film_persons:
+                    if person_id is None and name in self.persons.ambiguous:
+                        self.skipped_links += 1
+                        continue
+                    links.append(PersonFilmWork(film_work_id=film.id, person_id=person_id or person_ids[name],
+                                                role=role))
+            self.delete_links(GenreFilmWork, film_ids)
+            # Persons of other roles are not in the file and stay.
+            roles = [str(role) for role in ROLES.values()]
+            self.delete_links(PersonFilmWork, film_ids, " AND role = ANY(%s)", (roles,))
+            GenreFilmWork.objects.bulk_create([
+                GenreFilmWork(film_work_id=film.id, genre_id=genre_ids[name])
+                for film, record in zip(films, records) for name in record.get("genres") or ()
+            ], ignore_conflicts=True)
+            PersonFilmWork.objects.bulk_create(links, ignore_conflicts=True)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or detect_format(path)
+        batch_size = options["batch_size"]
+        self.genres = NameLookup(Genre, "name", batch_size)
+        self.persons = NameLookup(Person, "full_name", batch_size)
+        self.skipped_links = 0
+        if settings.MOVIES_API_CACHE_BACKEND != "redis":
+            self.stderr.write("Caches of the API are not shared, web workers may return old films and counts "
+                              "until the TTL of their caches")
+        fp = sys.stdin if path == "-" else open(path, newline="")
+        count = 0
+        start = perf_counter()
+        try:
+            records = enumerate(self.read_records(fp, file_format), 1)
+            while batch := list(islice(records, batch_size)):
+                # The last record of a film wins, a row can't be updated twice by one INSERT ... ON CONFLICT.
+                films = {}
+                for number, record in batch:
+                    film = self.make_film(number, record)
+                    films[film.id] = (film, record, self.get_persons(number, record))
+                self.import_batch(*(list(values) for values in zip(*films.values())))
+                count += len(batch)
+                self.stderr.write("Imported {} films, {:.0f} films/s".format(count, count / (perf_counter() - start)))
+        finally:
+            if fp is not sys.stdin:
+                fp.close()
+            # bulk_create does not send signals.
+            CountProvider.invalidate()
+            response_cache.invalidate()
+        if self.persons.ambiguous:
+            self.stderr.write("Skipped {} links of persons with ambiguous names, give their ids in the file: {}".format(
+                self.skipped_links, ", ".join(sorted(self.persons.ambiguous))))
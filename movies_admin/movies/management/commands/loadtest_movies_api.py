@@ -0,0 +1,59 @@
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from urllib.error import HTTPError, URLError
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test of the movies API: sends requests to the running server from concurrent clients and reports "
+        "the throughput and latency. Run it against the uWSGI and the ASGI deployment to compare them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://localhost:8000", help="address of the server")
+        parser.add_argument("--paths", nargs="+", default=["/api/v1/movies/", "/api/v1/movies/?page=2"],
+                            help="requested paths, clients go through them in turn")
+        parser.add_argument("--concurrency", type=int, default=16, help="number of concurrent clients")
+        parser.add_argument("--requests", type=int, default=1000, help="total number of requests")
+        parser.add_argument("--timeout", type=float, default=30, help="timeout of a request in seconds")
+
+    @staticmethod
+    def fetch(url: str, timeout: float) -> tuple[float, int]:
+        """Latency in seconds and status of the request, 0 if there was no response."""
+        start = perf_counter()
+        try:
+            with urlopen(url, timeout=timeout) as response:
+                response.read()
+                status = response.status
+        except HTTPError as error:
+            status = error.code
+        except (URLError, OSError):
+            status = 0
+        return perf_counter() - start, status
+
+    @staticmethod
+    def percentile(values: list[float], percent: int) -> float:
+        return statistics.quantiles(values, n=100, method="inclusive")[percent - 1] if len(values) > 1 else values[0]
+
+    def handle(self, *args, **options):
+        urls = [
+            options["base_url"].rstrip("/") + options["paths"][number % len(options["paths"])]
+            for number in range(options["requests"])
+        ]
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            results = list(executor.map(lambda url: self.fetch(url, options["timeout"]), urls))
+        seconds = perf_counter() - start
+
+        latencies = [latency * 1000 for latency, status in results if status == 200]
+        errors = len(results) - len(latencies)
+        self.stdout.write("{} requests, {} clients, {:.2f} s, {:.1f} requests/s, {} errors".format(
+            len(results), options["concurrency"], seconds, len(results) / seconds, errors))
+        if latencies:
+            self.stdout.write("latency, ms: p50 {:.1f}, p95 {:.1f}, p99 {:.1f}, max {:.1f}".format(
+                self.percentile(latencies, 50), self.percentile(latencies, 95),
+                self.percentile(latencies, 99), max(latencies)))
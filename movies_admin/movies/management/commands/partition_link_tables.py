@@ -0,0 +1,138 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from movies.models import GenreFilmWork, PersonFilmWork
+
+
+class Command(BaseCommand):
+    help = (
+        "Converts the link tables of films to tables hash partitioned by film_work_id. "
+        "Queries of the API and the ETL by film_work_id read only the partitions of the films, "
+        "vacuum and index maintenance work on small partitions. "
+        "The rows are copied into a new partitioned table while the original table is locked against writes "
+        "but can still be read; constraints and indexes are built after the copy. Only the final swap of the "
+        "tables (renames, a catalog change) blocks reads, until the commit. The original table is dropped; "
+        "with --keep-old it is kept as <table>_unpartitioned without foreign keys, so films, genres and persons "
+        "can still be deleted. "
+        "The primary key of a partitioned table must contain the partition key, so it becomes (id, film_work_id): "
+        "the database no longer enforces unique ids alone. The models keep id as the primary key, ids stay unique "
+        "because they are generated as uuid4 by Django and sqlite_to_postgres copies them from unique source keys. "
+        "Indexes of a partitioned table can't be created concurrently, so later migrations of these tables "
+        "need AddIndex instead of AddIndexConcurrently."
+    )
+    models = {model._meta.model_name: model for model in (PersonFilmWork, GenreFilmWork)}
+    partition_key = "film_work_id"
+    old_suffix = "_unpartitioned"
+    new_suffix = "_partitioned"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--models", nargs="+", default=list(self.models), choices=list(self.models),
+                            help="link tables to convert")
+        parser.add_argument("--partitions", type=int, default=16, help="number of hash partitions")
+        parser.add_argument("--keep-old", action="store_true",
+                            help="keep the original table as <table>_unpartitioned (without foreign keys) for checks")
+        parser.add_argument("--dry-run", action="store_true", help="print SQL without executing it")
+
+    @staticmethod
+    def split_table(db_table: str) -> tuple[str, str]:
+        # db_table is quoted as 'schema"."table' in the models.
+        schema, _, table = db_table.rpartition('"."')
+        return schema or "public", table
+
+    @staticmethod
+    def fetchall(sql: str, params: list) -> list[tuple]:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def is_partitioned(self, schema: str, table: str) -> bool:
+        return bool(self.fetchall(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace WHERE n.nspname = %s AND c.relname = %s",
+            [schema, table],
+        ))
+
+    def get_statements(self, schema: str, table: str, partitions: int, keep_old: bool) -> list[str]:
+        qn = connection.ops.quote_name
+        full_name = "{}.{}".format(qn(schema), qn(table))
+        new_table = table + self.new_suffix
+        new_full_name = "{}.{}".format(qn(schema), qn(new_table))
+        regclass = [full_name]
+        # The new table gets the same constraints and indexes, under temporary names until the swap.
+        constraints = self.fetchall(
+            "SELECT conname, contype, pg_get_constraintdef(oid), conindid FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype IN ('p', 'u', 'f')",
+            regclass,
+        )
+        constraint_indexes = [index_oid for _, _, _, index_oid in constraints if index_oid]
+        indexes = self.fetchall(
+            "SELECT c.relname, i.indexrelid, pg_get_indexdef(i.indexrelid), i.indisunique FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid WHERE i.indrelid = %s::regclass",
+            regclass,
+        )
+        index_names = [name for name, _, _, _ in indexes]
+
+        def temporary_name(name: str) -> str:
+            return (name + self.new_suffix)[:63]
+
+        statements = [
+            # Reads of the table go on during the copy, writes wait for the commit.
+            "LOCK TABLE {} IN SHARE ROW EXCLUSIVE MODE".format(full_name),
+            "CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE) "
+            "PARTITION BY HASH ({})".format(new_full_name, full_name, qn(self.partition_key)),
+        ]
+        for remainder in range(partitions):
+            statements.append("CREATE TABLE {}.{} PARTITION OF {} FOR VALUES WITH (MODULUS {}, REMAINDER {})".format(
+                qn(schema), qn("{}_p{}".format(table, remainder)), new_full_name, partitions, remainder))
+        statements.append("INSERT INTO {} SELECT * FROM {}".format(new_full_name, full_name))
+        for name, kind, definition, index_oid in constraints:
+            if kind == "p":
+                # The key of a partitioned table must contain the partition key.
+                definition = "PRIMARY KEY (id, {})".format(qn(self.partition_key))
+            elif kind == "u" and self.partition_key not in definition:
+                raise CommandError("Unique constraint {} does not contain {}".format(name, self.partition_key))
+            # Names of the indexes of primary keys and unique constraints are unique in the schema.
+            statements.append("ALTER TABLE {} ADD CONSTRAINT {} {}".format(
+                new_full_name, qn(temporary_name(name) if index_oid else name), definition))
+        for name, index_oid, definition, unique in indexes:
+            if index_oid not in constraint_indexes:
+                statements.append("CREATE {}INDEX {} ON {}{}".format(
+                    "UNIQUE " if unique else "", qn(temporary_name(name)), new_full_name,
+                    definition[definition.index(" USING "):]))
+        statements.append("ANALYZE {}".format(new_full_name))
+
+        # The swap: short, but it blocks reads of the table until the commit.
+        if keep_old:
+            # Foreign keys of the copy would forbid deleting films, genres and persons linked before the swap.
+            for name, kind, _, _ in constraints:
+                if kind == "f":
+                    statements.append("ALTER TABLE {} DROP CONSTRAINT {}".format(full_name, qn(name)))
+            statements.append("ALTER TABLE {} RENAME TO {}".format(full_name, qn(table + self.old_suffix)))
+            for name in index_names:
+                statements.append("ALTER INDEX {}.{} RENAME TO {}".format(
+                    qn(schema), qn(name), qn((name + self.old_suffix)[:63])))
+        else:
+            statements.append("DROP TABLE {}".format(full_name))
+        statements.append("ALTER TABLE {} RENAME TO {}".format(new_full_name, qn(table)))
+        # Renaming the index of a constraint renames the constraint too.
+        for name in index_names:
+            statements.append("ALTER INDEX {}.{} RENAME TO {}".format(qn(schema), qn(temporary_name(name)), qn(name)))
+        return statements
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Partitioning is supported only for PostgresSQL")
+        for model_name in options["models"]:
+            schema, table = self.split_table(self.models[model_name]._meta.db_table)
+            if self.is_partitioned(schema, table):
+                self.stdout.write("{}.{} is already partitioned".format(schema, table))
+                continue
+            with transaction.atomic():
+                statements = self.get_statements(schema, table, options["partitions"], options["keep_old"])
+                if options["dry_run"]:
+                    self.stdout.write(";\n".join(statements) + ";")
+                    continue
+                with connection.cursor() as cursor:
+                    for statement in statements:
+                        cursor.execute(statement)
+            self.stdout.write("{}.{} is partitioned into {} partitions".format(schema, table, options["partitions"]))
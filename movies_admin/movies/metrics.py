@@ -0,0 +1,147 @@
+import ipaddress
+import logging
+import os
+import random
+from contextlib import contextmanager
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import connections
+from django.http import Http404, HttpRequest, HttpResponse
+from django.utils.decorators import sync_only_middleware
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:
+    prometheus_client = None
+
+slow_query_logger = logging.getLogger("movies.slow_queries")
+
+if prometheus_client is not None:
+    # Labels are the URL pattern, not the path, so the number of series does not grow with ids.
+    REQUEST_LATENCY = prometheus_client.Histogram(
+        "movies_request_seconds", "Latency of requests", ["route", "method", "status"]
+    )
+    REQUEST_DB_TIME = prometheus_client.Histogram(
+        "movies_request_db_seconds", "Time of database queries per request", ["route"]
+    )
+    REQUEST_QUERIES = prometheus_client.Histogram(
+        "movies_request_queries", "Number of database queries per request", ["route"],
+        buckets=(1, 2, 3, 5, 10, 20, 50, 100, 200),
+    )
+    REQUEST_SERIALIZATION_TIME = prometheus_client.Histogram(
+        "movies_request_serialization_seconds", "Time of serialization of responses", ["route"]
+    )
+
+
+class RequestMetrics:
+    """Query count, database time and timings of the stages of a request."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.timings = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper."""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = perf_counter() - start
+            self.queries += 1
+            self.db_seconds += duration
+            if (duration * 1000 >= settings.MOVIES_METRICS_SLOW_QUERY_MS
+                    and random.random() < settings.MOVIES_METRICS_SLOW_QUERY_SAMPLE_RATE):
+                # Parameters are not logged, they can contain personal data and password hashes.
+                slow_query_logger.warning("Slow query %.1f ms: %s", duration * 1000, sql)
+
+
+@contextmanager
+def timing(request: HttpRequest, name: str):
+    """Measure a stage of the request for the Server-Timing header, e.g. serialization."""
+    metrics = getattr(request, "metrics", None)
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.timings[name] = metrics.timings.get(name, 0.0) + perf_counter() - start
+
+
+@contextmanager
+def track_queries(request: HttpRequest):
+    """Count queries of the current thread for the request."""
+    metrics = getattr(request, "metrics", None)
+    if metrics is None:
+        yield
+        return
+    with connections["default"].execute_wrapper(metrics):
+        yield
+
+
+def is_tracked(request: HttpRequest) -> bool:
+    return request.path.startswith(tuple(settings.MOVIES_METRICS_PATHS))
+
+
+def finish_request_metrics(request: HttpRequest, response: HttpResponse, total: float) -> HttpResponse:
+    """Add the Server-Timing header and observe the Prometheus metrics of the request."""
+    metrics = request.metrics
+    server_timing = ['db;dur={:.1f};desc="{} queries"'.format(metrics.db_seconds * 1000, metrics.queries)]
+    server_timing += ["{};dur={:.1f}".format(name, seconds * 1000) for name, seconds in metrics.timings.items()]
+    server_timing.append("total;dur={:.1f}".format(total * 1000))
+    response.headers["Server-Timing"] = ", ".join(server_timing)
+
+    if prometheus_client is not None:
+        route = request.resolver_match.route if request.resolver_match else "unknown"
+        REQUEST_LATENCY.labels(route, request.method, response.status_code).observe(total)
+        REQUEST_DB_TIME.labels(route).observe(metrics.db_seconds)
+        REQUEST_QUERIES.labels(route).observe(metrics.queries)
+        if "serialize" in metrics.timings:
+            REQUEST_SERIALIZATION_TIME.labels(route).observe(metrics.timings["serialize"])
+    return response
+
+
+@sync_only_middleware
+def request_metrics_middleware(get_response):
+    """Server-Timing header and Prometheus metrics for requests of MOVIES_METRICS_PATHS.
+
+    Queries are counted by an execute wrapper of the thread of the request, so the middleware is sync only:
+    under ASGI Django runs it in the same thread as the sync views.
+    """
+    def middleware(request):
+        if not is_tracked(request):
+            return get_response(request)
+        request.metrics = RequestMetrics()
+        start = perf_counter()
+        with track_queries(request):
+            response = get_response(request)
+        return finish_request_metrics(request, response, perf_counter() - start)
+    return middleware
+
+
+def is_metrics_client(request: HttpRequest) -> bool:
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(address in network for network in settings.MOVIES_METRICS_ALLOWED_NETWORKS)
+
+
+def metrics_view(request):
+    """Metrics in the Prometheus format for clients of MOVIES_METRICS_ALLOWED_NETWORKS.
+
+    Under uWSGI with several processes PROMETHEUS_MULTIPROC_DIR must be set.
+    """
+    if not settings.MOVIES_METRICS_ENDPOINT_ENABLED or prometheus_client is None:
+        raise Http404("Metrics are disabled")
+    if not is_metrics_client(request):
+        raise PermissionDenied
+    registry = prometheus_client.REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        # Metrics of all worker processes are collected from the files of the directory.
+        registry = prometheus_client.CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return HttpResponse(prometheus_client.generate_latest(registry), content_type=prometheus_client.CONTENT_TYPE_LATEST)
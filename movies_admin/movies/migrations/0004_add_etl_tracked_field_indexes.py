@@ -0,0 +1,45 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Indexes of the tracked-field queries of the ETL, as reported by postgres_to_es/index_check.py.
+
+    They are built concurrently, so the tables are not locked for writes.
+    """
+    atomic = False
+
+    dependencies = [
+        ("movies", "0003_add_search_indexes"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="filmwork",
+            index=models.Index(fields=["modified"], name="film_work_modified_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="genre",
+            index=models.Index(fields=["modified"], name="genre_modified_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="person",
+            index=models.Index(fields=["modified"], name="person_modified_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="genrefilmwork",
+            index=models.Index(fields=["created"], name="genre_film_work_created_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="genrefilmwork",
+            index=models.Index(fields=["genre", "film_work"], name="genre_film_work_genre_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="personfilmwork",
+            index=models.Index(fields=["created"], name="person_film_work_created_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="personfilmwork",
+            index=models.Index(fields=["person", "film_work"], name="person_film_work_person_idx"),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Index of the lookup of persons by name in import_movies (the trigram index does not serve "IN").
+
+    It is built concurrently, so the table is not locked for writes.
+    """
+    atomic = False
+
+    dependencies = [
+        ("movies", "0004_add_etl_tracked_field_indexes"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="person",
+            index=models.Index(fields=["full_name"], name="person_full_name_idx"),
+        ),
+    ]
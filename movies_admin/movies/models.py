@@ -1,5 +1,8 @@
 import uuid
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector
 from django.db import models
+from django.db.models.functions import Upper
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils.translation import gettext_lazy as _
 
@@ -52,6 +55,11 @@ class FilmWork(UUIDMixin, TimeStampedMixin):
         indexes = [
             models.Index(fields=["creation_date"], name="film_work_creation_date_idx"),
             models.Index(fields=["rating"], name="film_work_rating_idx"),
+            # Indexes of the tracked fields of the ETL (see postgres_to_es/index_check.py).
+            models.Index(fields=["modified"], name="film_work_modified_idx"),
+            # Indexes of the admin search (see movies.admin_tools.IndexedSearchMixin).
+            GinIndex(OpClass(Upper("title"), name="gin_trgm_ops"), name="film_work_title_trgm_idx"),
+            GinIndex(SearchVector("description", config="simple"), name="film_work_description_fts_idx"),
         ]
         constraints = [
             models.CheckConstraint(
@@ -72,6 +80,9 @@ class Genre(UUIDMixin, TimeStampedMixin):
         db_table = "content\".\"genre"
         verbose_name = _("Genre")
         verbose_name_plural = _("Genres")
+        indexes = [
+            models.Index(fields=["modified"], name="genre_modified_idx"),
+        ]
 
 
 class Person(UUIDMixin, TimeStampedMixin):
@@ -84,6 +95,11 @@ class Person(UUIDMixin, TimeStampedMixin):
         db_table = "content\".\"person"
         verbose_name = _("Person")
         verbose_name_plural = _("Persons")
+        indexes = [
+            GinIndex(OpClass(Upper("full_name"), name="gin_trgm_ops"), name="person_full_name_trgm_idx"),
+            models.Index(fields=["modified"], name="person_modified_idx"),
+            models.Index(fields=["full_name"], name="person_full_name_idx"),
+        ]
 
 
 class GenreFilmWork(UUIDMixin):
@@ -97,12 +113,18 @@ class GenreFilmWork(UUIDMixin):
         return "{} - {}".format(self.film_work, self.genre)
 
     class Meta:
+        # After manage.py partition_link_tables the key in the database is (id, film_work_id).
         db_table = "content\".\"genre_film_work"
         verbose_name = _("Genres movie")
         verbose_name_plural = _("Genres movies")
         constraints = [
             models.UniqueConstraint(fields=("film_work_id", "genre_id"), name="genre_film_work_idx")
         ]
+        indexes = [
+            models.Index(fields=["created"], name="genre_film_work_created_idx"),
+            # From a changed genre to its films without reading the table.
+            models.Index(fields=["genre", "film_work"], name="genre_film_work_genre_idx"),
+        ]
 
 
 class PersonFilmWork(UUIDMixin):
@@ -127,9 +149,15 @@ class PersonFilmWork(UUIDMixin):
         return "{} - {}".format(self.film_work, self.person)
 
     class Meta:
+        # After manage.py partition_link_tables the key in the database is (id, film_work_id).
         db_table = "content\".\"person_film_work"
         verbose_name = _("Film persons")
         verbose_name_plural = _("Films persons")
         constraints = [
             models.UniqueConstraint(fields=("film_work_id", "person_id", "role"), name="film_work_person_idx")
         ]
+        indexes = [
+            models.Index(fields=["created"], name="person_film_work_created_idx"),
+            # From a changed person to the films without reading the table.
+            models.Index(fields=["person", "film_work"], name="person_film_work_person_idx"),
+        ]
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from movies.api.v1.cache import response_cache
+from movies.api.v1.counts import CountProvider
+from movies.models import FilmWork, Genre, GenreFilmWork, Person, PersonFilmWork
+
+
+@receiver(post_save, sender=FilmWork)
+@receiver(post_delete, sender=FilmWork)
+def invalidate_movies_count(sender, **kwargs):
+    CountProvider.invalidate()
+
+
+@receiver(post_save, sender=FilmWork)
+@receiver(post_delete, sender=FilmWork)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Person)
+@receiver(post_delete, sender=Person)
+@receiver(post_save, sender=GenreFilmWork)
+@receiver(post_delete, sender=GenreFilmWork)
+@receiver(post_save, sender=PersonFilmWork)
+@receiver(post_delete, sender=PersonFilmWork)
+def invalidate_movies_api_cache(sender, **kwargs):
+    response_cache.invalidate()
@@ -0,0 +1,11 @@
+from django.db import connections
+from django.db.models.signals import pre_migrate
+
+
+def create_content_schema(using, **kwargs):
+    """Tables of the app are in the "content" schema, which src/init_db.sql creates outside of migrations."""
+    with connections[using].cursor() as cursor:
+        cursor.execute("CREATE SCHEMA IF NOT EXISTS content")
+
+
+pre_migrate.connect(create_content_schema, dispatch_uid="movies_tests_create_content_schema")
@@ -0,0 +1,40 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from movies.models import FilmWork, Person, PersonFilmWork
+
+
+class CatalogRoundTripTests(TestCase):
+    def setUp(self):
+        self.film = FilmWork.objects.create(title="Film", type=FilmWork.Types.MOVIE)
+        self.other_film = FilmWork.objects.create(title="Other film", type=FilmWork.Types.MOVIE)
+        # Namesakes, only the id tells them apart.
+        self.actor = Person.objects.create(full_name="John Smith")
+        self.other_actor = Person.objects.create(full_name="John Smith")
+        PersonFilmWork.objects.create(film_work=self.film, person=self.actor, role=PersonFilmWork.Roles.ACTOR)
+        PersonFilmWork.objects.create(
+            film_work=self.other_film, person=self.other_actor, role=PersonFilmWork.Roles.ACTOR
+        )
+
+    def round_trip(self, extension: str):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "catalog." + extension)
+            call_command("export_movies", path, stderr=StringIO())
+            PersonFilmWork.objects.all().delete()
+            call_command("import_movies", path, stderr=StringIO())
+
+    def assert_links_kept(self):
+        self.assertEqual(list(self.film.persons.all()), [self.actor])
+        self.assertEqual(list(self.other_film.persons.all()), [self.other_actor])
+
+    def test_csv_keeps_namesakes(self):
+        self.round_trip("csv")
+        self.assert_links_kept()
+
+    def test_ndjson_keeps_namesakes(self):
+        self.round_trip("ndjson")
+        self.assert_links_kept()
@@ -0,0 +1,69 @@
+import uuid
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import TestCase
+
+from movies.api.v1.cache import CachedResponseMixin
+from movies.api.v1.pagination import KeysetPaginator
+from movies.models import FilmWork
+
+
+@mock.patch.object(CachedResponseMixin, "cache_responses", False)
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        FilmWork.objects.bulk_create([
+            FilmWork(title="Film {}".format(number), type=FilmWork.Types.MOVIE,
+                     creation_date=date(2000, 1, 1) + timedelta(days=number), rating=number / 10)
+            for number in range(60)
+        ])
+
+    def get_list(self, **params):
+        return self.client.get("/api/v1/movies/", params)
+
+    def test_pages_follow_the_cursor(self):
+        ids = []
+        response = self.get_list(pagination="cursor")
+        while True:
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            ids += [film["id"] for film in data["results"]]
+            if data["next"] is None:
+                break
+            response = self.get_list(cursor=data["next"])
+        self.assertEqual(len(ids), 60)
+        self.assertEqual(len(set(ids)), 60)
+
+    def test_cursor_of_another_sorting(self):
+        response = self.get_list(pagination="cursor", sort="rating")
+        response = self.get_list(cursor=response.json()["next"], sort="rating")
+        self.assertEqual(response.status_code, 200)
+
+    def test_tampered_cursors(self):
+        cursors = [
+            "not base64!",
+            KeysetPaginator.encode_cursor({"value": 1}),
+            KeysetPaginator.encode_cursor(["2000-01-01"]),
+            KeysetPaginator.encode_cursor(["2000-01-01", "not-a-uuid"]),
+            KeysetPaginator.encode_cursor(["not-a-date", str(uuid.uuid4())]),
+            KeysetPaginator.encode_cursor([["2000-01-01"], str(uuid.uuid4())]),
+            KeysetPaginator.encode_cursor(["2000-01-01", None]),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.get_list(cursor=cursor).status_code, 400)
+
+    def test_tampered_rating_cursor(self):
+        cursor = KeysetPaginator.encode_cursor(["high", str(uuid.uuid4())])
+        self.assertEqual(self.get_list(cursor=cursor, sort="rating").status_code, 400)
+
+    def test_tampered_export_resume_token(self):
+        resume = KeysetPaginator.encode_cursor(["yesterday", str(uuid.uuid4())])
+        self.assertEqual(self.client.get("/api/v1/movies/export", {"resume": resume}).status_code, 400)
+
+    def test_invalid_export_modified_since(self):
+        for value in ("yesterday", "2020-13-45T00:00:00"):
+            with self.subTest(value=value):
+                response = self.client.get("/api/v1/movies/export", {"modified_since": value})
+                self.assertEqual(response.status_code, 400)
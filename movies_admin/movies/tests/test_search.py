@@ -0,0 +1,91 @@
+import uuid
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from elasticsearch import BadRequestError, ConnectionError, NotFoundError
+
+from movies.api.v1.cache import CachedResponseMixin
+from movies.api.v1.pagination import KeysetPaginator
+
+PAGE_SIZE = 3
+
+
+def make_hits(count: int) -> list[dict]:
+    hits = []
+    for number in range(count):
+        film_id = str(uuid.uuid4())
+        hits.append({
+            "_source": {"id": film_id, "title": "Film {}".format(number), "genre": ["Drama", "Comedy"]},
+            "sort": [10.0 - number, film_id],
+        })
+    return hits
+
+
+def make_response(hits: list[dict], total: int) -> dict:
+    return {"hits": {"total": {"value": total}, "hits": hits}}
+
+
+@override_settings(MOVIES_SEARCH_INDEX="movies")
+@mock.patch.object(CachedResponseMixin, "cache_responses", False)
+@mock.patch("movies.api.v1.views.MoviesSearchApi.paginate_by", PAGE_SIZE)
+@mock.patch("movies.api.v1.search.get_elastic")
+class MoviesSearchApiTests(SimpleTestCase):
+    url = "/api/v1/movies/search/"
+
+    def test_query_body(self, get_elastic):
+        get_elastic.return_value.search.return_value = make_response([], 0)
+        response = self.client.get(self.url, {"query": "star", "type": "movie", "rating_min": "5",
+                                              "sort": "-rating", "fields": "title,genres"})
+        self.assertEqual(response.status_code, 200)
+        kwargs = get_elastic.return_value.search.call_args.kwargs
+        self.assertEqual(kwargs["index"], "movies")
+        self.assertEqual(kwargs["size"], PAGE_SIZE + 1)
+        self.assertIsNone(kwargs["search_after"])
+        self.assertEqual(kwargs["query"]["bool"]["must"][0]["multi_match"]["query"], "star")
+        self.assertIn({"term": {"type": "movie"}}, kwargs["query"]["bool"]["filter"])
+        self.assertIn({"range": {"imdb_rating": {"gte": 5.0}}}, kwargs["query"]["bool"]["filter"])
+        self.assertEqual(kwargs["sort"], [{"imdb_rating": {"order": "desc", "missing": "_last"}}, {"id": "asc"}])
+        self.assertEqual(set(kwargs["source"]), {"id", "title", "genre"})
+
+    def test_results_and_next_cursor(self, get_elastic):
+        hits = make_hits(PAGE_SIZE + 1)
+        get_elastic.return_value.search.return_value = make_response(hits, 10)
+        data = self.client.get(self.url, {"query": "film"}).json()
+        self.assertEqual(data["count"], 10)
+        self.assertEqual(data["total_pages"], 4)
+        self.assertEqual([film["id"] for film in data["results"]], [hit["_source"]["id"] for hit in hits[:PAGE_SIZE]])
+        self.assertEqual(data["results"][0]["genres"], ["Comedy", "Drama"])
+        self.assertEqual(KeysetPaginator.decode_cursor(data["next"]), hits[PAGE_SIZE - 1]["sort"])
+
+    def test_cursor_is_passed_as_search_after(self, get_elastic):
+        get_elastic.return_value.search.return_value = make_response([], 0)
+        search_after = [7.5, str(uuid.uuid4())]
+        self.client.get(self.url, {"cursor": KeysetPaginator.encode_cursor(search_after)})
+        self.assertEqual(get_elastic.return_value.search.call_args.kwargs["search_after"], search_after)
+
+    def test_no_next_cursor_on_the_last_full_page(self, get_elastic):
+        # The total is a multiple of the page size: the last page is full, but there is nothing after it.
+        get_elastic.return_value.search.return_value = make_response(make_hits(PAGE_SIZE), PAGE_SIZE * 2)
+        cursor = KeysetPaginator.encode_cursor([8.0, str(uuid.uuid4())])
+        data = self.client.get(self.url, {"cursor": cursor}).json()
+        self.assertEqual(len(data["results"]), PAGE_SIZE)
+        self.assertIsNone(data["next"])
+
+    def test_invalid_cursor(self, get_elastic):
+        self.assertEqual(self.client.get(self.url, {"cursor": "not a cursor"}).status_code, 400)
+        get_elastic.return_value.search.assert_not_called()
+
+    def test_cursor_rejected_by_elasticsearch(self, get_elastic):
+        get_elastic.return_value.search.side_effect = BadRequestError("search_after", mock.Mock(status=400), {})
+        cursor = KeysetPaginator.encode_cursor(["high", str(uuid.uuid4())])
+        self.assertEqual(self.client.get(self.url, {"cursor": cursor}).status_code, 400)
+
+    def test_elasticsearch_unavailable(self, get_elastic):
+        errors = [
+            ConnectionError("Connection refused"),
+            NotFoundError("index_not_found_exception", mock.Mock(status=404), {}),
+        ]
+        for error in errors:
+            with self.subTest(error=type(error).__name__):
+                get_elastic.return_value.search.side_effect = error
+                self.assertEqual(self.client.get(self.url, {"query": "film"}).status_code, 503)
@@ -42,12 +42,14 @@ class ProcessETL:
 
     @backoff(logger=logger)
     def check_and_create_index(self, etl: EtlSettings):
-        """If the ElasticSearch index does not exist, create it from a json file."""
+        """If the ElasticSearch index does not exist, create it from a json file, otherwise add new fields to it."""
         elastic_conn = self.elastic_loader.get_elastic()
+        with open(Path.joinpath(Path(self.settings.config_dir), etl.mapping_file), "r") as fp:
+            data = load(fp)
         if not elastic_conn.indices.exists(index=etl.elastic_index):
-            with open(Path.joinpath(Path(self.settings.config_dir), etl.mapping_file), "r") as fp:
-                data = load(fp)
-                elastic_conn.indices.create(index=etl.elastic_index, **data)
+            elastic_conn.indices.create(index=etl.elastic_index, **data)
+        else:
+            elastic_conn.indices.put_mapping(index=etl.elastic_index, **data["mappings"])
 
     @backoff(logger=logger)
     def set_pg_conn(self):
@@ -0,0 +1,109 @@
+"""
+Indexes needed by the tracked-field queries of the ETL bindings.
+
+The queries of sql_build filter and sort tables by their field_actual_state_name and go from a changed
+child table to the films through the link tables. For each binding the script derives:
+    - an index on the tracked field of every table;
+    - a covering index of every link table on (columns joined by its children, columns joined to its parent),
+      e.g. person_film_work (person_id, film_work_id).
+
+    python index_check.py          # reports missing indexes, exit code 1 if there are any
+    python index_check.py --sql    # CREATE INDEX statements for the missing indexes
+"""
+import argparse
+import sys
+from contextlib import closing
+from typing import NamedTuple
+
+from psycopg2.extensions import connection as pg_connection
+
+from config import settings
+from config.models import EtlSettings, ExchangeTableSettings
+from db_connection import postgres_db_connection
+
+
+class IndexSpec(NamedTuple):
+    schema: str
+    table: str
+    columns: tuple[str, ...]
+
+    @property
+    def name(self) -> str:
+        # Names of Django indexes are limited by 30 characters, so only the leading column is in the name.
+        return "{}_{}_idx".format(self.table, self.columns[0].removesuffix("_id"))
+
+    def create_statement(self) -> str:
+        return 'CREATE INDEX CONCURRENTLY IF NOT EXISTS "{}" ON "{}"."{}" ({});'.format(
+            self.name, self.schema, self.table, ", ".join('"{}"'.format(column) for column in self.columns))
+
+
+def _table_indexes(table: ExchangeTableSettings, etl: EtlSettings, is_child: bool) -> list[IndexSpec]:
+    schema = table.db_schema or etl.sql_db.db_schema
+    key_field = table.key_field_name or etl.sql_db.key_field_name
+    indexes = []
+    if table.field_actual_state_name:
+        indexes.append(IndexSpec(schema, table.name, (table.field_actual_state_name,)))
+    if is_child:
+        columns = [column for child in table.children for column in child.join.values()]
+        columns += [column for column in table.join if column not in columns]
+        if columns and columns != [key_field]:
+            indexes.append(IndexSpec(schema, table.name, tuple(columns)))
+    for child in table.children:
+        indexes.extend(_table_indexes(child, etl, True))
+    return indexes
+
+
+def required_indexes(etl: EtlSettings) -> list[IndexSpec]:
+    """Indexes for all bindings without duplicates."""
+    indexes = []
+    for binding in etl.bindings_elastic_to_sql:
+        for index in _table_indexes(binding.table, etl, False):
+            if index not in indexes:
+                indexes.append(index)
+    return indexes
+
+
+def existing_index_columns(pg_conn: pg_connection, schema: str, table: str) -> list[tuple[str, ...]]:
+    """Columns of the indexes of the table (expression indexes are skipped)."""
+    with pg_conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT array_agg(a.attname::text ORDER BY k.ord)
+            FROM pg_index i
+            JOIN pg_class t ON t.oid = i.indrelid
+            JOIN pg_namespace n ON n.oid = t.relnamespace
+            CROSS JOIN LATERAL unnest(i.indkey) WITH ORDINALITY AS k(attnum, ord)
+            JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = k.attnum
+            WHERE n.nspname = %s AND t.relname = %s AND i.indpred IS NULL
+            GROUP BY i.indexrelid
+            """,
+            (schema, table),
+        )
+        return [tuple(row[0]) for row in cur.fetchall()]
+
+
+def missing_indexes(pg_conn: pg_connection, etl: EtlSettings) -> list[IndexSpec]:
+    """Required indexes for which there is no index starting with the same columns."""
+    missing = []
+    for index in required_indexes(etl):
+        existing = existing_index_columns(pg_conn, index.schema, index.table)
+        if not any(columns[:len(index.columns)] == index.columns for columns in existing):
+            missing.append(index)
+    return missing
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sql", action="store_true", help="print CREATE INDEX statements for missing indexes")
+    args = parser.parse_args()
+
+    with closing(postgres_db_connection(settings.postgres_dsn, settings.db_timeout)) as pg_conn:
+        missing = missing_indexes(pg_conn, settings.etl_settings)
+    for index in missing:
+        print(index.create_statement() if args.sql else "Missing index on {}.{} ({})".format(
+            index.schema, index.table, ", ".join(index.columns)))
+    return 1 if missing and not args.sql else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 """Data models to upload to Elasticsearch."""
+from datetime import date
 from uuid import UUID
 from enum import Enum
 from typing import Optional, Any
@@ -33,6 +34,8 @@ class FilmWork(ElasticModel):
     imdb_rating: Optional[float] = Field(None, gte=0, lte=100)
     genre: list[str]
     description: Optional[str] = ""
+    creation_date: Optional[date] = None
+    type: Optional[str] = None
     director: list[str] = []
     actors_names: list[str] = []
     writers_names: list[str] = []
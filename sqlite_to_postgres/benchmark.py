@@ -0,0 +1,211 @@
+"""Benchmark of loading data from SQLite to PostgresSQL.
+
+Generates SQLite databases with the schema of the copied tables at the chosen scales and loads them
+in each load mode into a separate PostgresSQL schema, which copies the structure of the destination schema.
+
+    python benchmark.py --scales 1000 10000 --modes execute_values copy --output bench.jsonl
+"""
+import argparse
+import json
+import random
+import sqlite3
+import tracemalloc
+from datetime import date, datetime, timedelta, timezone
+from enum import Enum
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from uuid import uuid4
+
+import psycopg2
+from psycopg2.extensions import connection as _connection
+from psycopg2.extras import register_uuid
+
+import models
+from config import settings
+from db_exchange import PostgresSaver, SQLiteExtractor
+from load_data import conn_context, load_table
+
+BENCHMARK_SCHEMA = "benchmark"
+GENRES_COUNT = 30
+# Number of linked records per film.
+GENRES_PER_FILM = 2
+PERSONS_PER_FILM = 4
+
+
+def _sqlite_type(model_field) -> str:
+    return "REAL" if issubclass(model_field.type_, float) else "TEXT"
+
+
+def create_sqlite_schema(conn: sqlite3.Connection):
+    """Create the tables of the application settings with the types of Pydantic models."""
+    for table in settings.tables:
+        model_fields = {field.alias: field for field in getattr(models, table.model_name).__fields__.values()}
+        columns = []
+        for field in table.fields:
+            primary_key = " PRIMARY KEY" if field == settings.key_field_name else ""
+            columns.append("\"{}\" {}{}".format(field, _sqlite_type(model_fields[field]), primary_key))
+        conn.execute("CREATE TABLE \"{}\" ({})".format(table.name, ", ".join(columns)))
+
+
+def _timestamp(value: datetime) -> str:
+    """Timestamp in the format of the source database."""
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f") + "+00"
+
+
+def _enum_values(enum: type[Enum]) -> list[str]:
+    return [item.value for item in enum]
+
+
+def generate_sqlite_fixture(db_path: str, films_count: int, seed: int = 0):
+    """Generate the source database with films_count films and linked genres and persons."""
+    rnd = random.Random(seed)
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+    def timestamps() -> tuple[str, str]:
+        created = start + timedelta(seconds=rnd.randrange(10 ** 7))
+        return _timestamp(created), _timestamp(created + timedelta(seconds=rnd.randrange(10 ** 6)))
+
+    def uuid() -> str:
+        return str(uuid4())
+
+    conn = sqlite3.connect(db_path)
+    create_sqlite_schema(conn)
+    film_ids = [uuid() for _ in range(films_count)]
+    genre_ids = [uuid() for _ in range(GENRES_COUNT)]
+    person_ids = [uuid() for _ in range(films_count)]
+    film_types = _enum_values(models.FileWorkTypeEnum)
+    roles = _enum_values(models.PersonRoles)
+    rows = {
+        "film_work": [
+            (film_id, "Film {}".format(number), "Description of the film {}. ".format(number) * 5,
+             (date(1950, 1, 1) + timedelta(days=rnd.randrange(25000))).isoformat(),
+             round(rnd.uniform(0, 10), 1), rnd.choice(film_types), *timestamps())
+            for number, film_id in enumerate(film_ids)
+        ],
+        "genre": [
+            (genre_id, "Genre {}".format(number), "Description of the genre {}".format(number), *timestamps())
+            for number, genre_id in enumerate(genre_ids)
+        ],
+        "person": [
+            (person_id, "Person {}".format(number), *timestamps()) for number, person_id in enumerate(person_ids)
+        ],
+        "genre_film_work": [
+            (uuid(), genre_id, film_id, timestamps()[0])
+            for film_id in film_ids for genre_id in rnd.sample(genre_ids, GENRES_PER_FILM)
+        ],
+        "person_film_work": [
+            (uuid(), person_id, film_id, rnd.choice(roles), timestamps()[0])
+            for film_id in film_ids for person_id in rnd.sample(person_ids, min(PERSONS_PER_FILM, films_count))
+        ],
+    }
+    for table in settings.tables:
+        placeholders = ", ".join(["?"] * len(table.fields))
+        conn.executemany("INSERT INTO \"{}\" VALUES ({})".format(table.name, placeholders), rows[table.name])
+    conn.commit()
+    conn.close()
+
+
+def prepare_benchmark_schema(pgconn: _connection, schema: str):
+    """Recreate the benchmark schema with empty copies of the destination tables (without foreign keys)."""
+    cur = pgconn.cursor()
+    cur.execute("DROP SCHEMA IF EXISTS \"{0}\" CASCADE; CREATE SCHEMA \"{0}\";".format(schema))
+    for table in settings.tables:
+        cur.execute("CREATE TABLE \"{0}\".\"{2}\" (LIKE \"{1}\".\"{2}\" INCLUDING ALL)".format(
+            schema, settings.schema_dest_db, table.name))
+    cur.close()
+    pgconn.commit()
+
+
+def table_payload_bytes(conn: sqlite3.Connection, table) -> int:
+    """The size of the text representation of the copied fields."""
+    lengths = " + ".join(["COALESCE(length(\"{}\"), 0)".format(field) for field in table.fields])
+    return conn.execute("SELECT COALESCE(SUM({}), 0) FROM \"{}\"".format(lengths, table.name)).fetchone()[0]
+
+
+def load_tables(sqlite_path: str, pgconn: _connection, load_mode: str, schema: str,
+                trace_memory: bool = False) -> list[dict]:
+    """Load all tables into the empty benchmark schema, measure time or, with trace_memory, peak memory."""
+    prepare_benchmark_schema(pgconn, schema)
+    measurements = []
+    with conn_context(sqlite_path, settings.get("sqlite_mmap_size", 0),
+                      settings.get("sqlite_cache_size_kib", 0)) as sqlite_conn:
+        postgres_saver = PostgresSaver(pgconn, schema, load_mode)
+        sqlite_extractor = SQLiteExtractor(sqlite_conn, settings.count_entries)
+        for table in settings.tables:
+            rows_before = sqlite_extractor.rows_read
+            commits_before = postgres_saver.commit_count
+            payload = table_payload_bytes(sqlite_conn, table)
+            if trace_memory:
+                tracemalloc.start()
+            start = perf_counter()
+            success = load_table(sqlite_extractor, postgres_saver, table, settings.key_field_name)
+            seconds = perf_counter() - start
+            peak_memory = 0
+            if trace_memory:
+                peak_memory = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            measurements.append({
+                "table": table.name,
+                "success": success,
+                "rows": sqlite_extractor.rows_read - rows_before,
+                "payload": payload,
+                "seconds": seconds,
+                "commits": postgres_saver.commit_count - commits_before,
+                "peak_memory": peak_memory,
+            })
+    return measurements
+
+
+def benchmark_mode(sqlite_path: str, pgconn: _connection, load_mode: str, schema: str) -> list[dict]:
+    """Load all tables in load_mode and measure each table.
+
+    tracemalloc slows down every allocation, so throughput and peak memory are measured by separate loads.
+    """
+    timed = load_tables(sqlite_path, pgconn, load_mode, schema)
+    traced = load_tables(sqlite_path, pgconn, load_mode, schema, trace_memory=True)
+    results = []
+    for measurement, memory_measurement in zip(timed, traced):
+        rows, seconds = measurement["rows"], measurement["seconds"]
+        results.append({
+            "mode": load_mode,
+            "table": measurement["table"],
+            "success": measurement["success"] and memory_measurement["success"],
+            "rows": rows,
+            "seconds": round(seconds, 4),
+            "rows_per_second": round(rows / seconds, 1) if seconds else 0.0,
+            "mb_per_second": round(measurement["payload"] / seconds / 2 ** 20, 3) if seconds else 0.0,
+            "commits": measurement["commits"],
+            "peak_memory_mb": round(memory_measurement["peak_memory"] / 2 ** 20, 3),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000], help="numbers of films")
+    parser.add_argument("--modes", nargs="+", default=list(PostgresSaver.LOAD_MODES),
+                        choices=PostgresSaver.LOAD_MODES, help="load modes of PostgresSaver")
+    parser.add_argument("--schema", default=BENCHMARK_SCHEMA,
+                        help="PostgresSQL schema for loading, it is dropped and created again")
+    parser.add_argument("--output", help="file to append the results in JSON Lines format")
+    args = parser.parse_args()
+
+    started = datetime.now(timezone.utc).isoformat()
+    register_uuid()
+    with TemporaryDirectory() as tmp_dir, psycopg2.connect(**settings.pg_dsl) as pgconn:
+        for scale in args.scales:
+            sqlite_path = str(Path(tmp_dir, "bench_{}.sqlite".format(scale)))
+            generate_sqlite_fixture(sqlite_path, scale)
+            for load_mode in args.modes:
+                for result in benchmark_mode(sqlite_path, pgconn, load_mode, args.schema):
+                    result.update(scale=scale, started=started)
+                    print("{scale:>8} {mode:<15} {table:<17} {rows:>9} rows {rows_per_second:>10} rows/s "
+                          "{mb_per_second:>8} MB/s {commits:>6} commits {peak_memory_mb:>8} MB peak".format(**result))
+                    if args.output:
+                        with open(args.output, "a") as fp:
+                            fp.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,8 @@
 """A module that implements functionality for downloading and uploading data from a DB."""
+from datetime import date
+from enum import Enum
+from io import StringIO
+from time import perf_counter
 from typing import Callable
 from sqlite3 import Connection as SqliteConnection
 from sqlite3 import Cursor
@@ -12,9 +16,29 @@ import query_build
 
 class PostgresSaver:
     """Class for saving data to PostgresSQL."""
-    def __init__(self, conn: psql_connection, schema: str = ""):
+    LOAD_MODES = ("execute_values", "copy")
+    # Escaping of special characters in the text format of COPY.
+    COPY_ESCAPE = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+    def __init__(self, conn: psql_connection, schema: str = "", load_mode: str = "execute_values",
+                 merge: query_build.MergeOptions | None = None):
+        """Init the PostgresSaver object.
+        Args:
+            conn: connection to PostgresSQL database
+            schema: schema of destination tables
+            load_mode: "execute_values" - multi-row INSERT, "copy" - COPY through a temporary table
+            merge: if set, existing records are updated when their content has changed,
+                otherwise they are skipped
+        """
+        if load_mode not in self.LOAD_MODES:
+            raise ValueError("Unknown load mode \"{}\"".format(load_mode))
         self.conn = conn
         self.schema = schema
+        self.load_mode = load_mode
+        self.merge = merge
+        self.commit_count = 0
+        # {table_name: {"inserted": n, "updated": n, "unchanged": n}}
+        self.stats = {}
 
     def _full_table_name(self, table_name: str) -> str:
         """Get table fullname by scheme and table name."""
@@ -23,7 +47,7 @@ class PostgresSaver:
         else:
             return "\"{0}\".\"{1}\"".format(self.schema, table_name)
 
-    def save(self, table_name: str, model: BaseModel, data: list[BaseModel], key_fields: []):
+    def save(self, table_name: str, model: BaseModel, data: list[BaseModel], key_fields: [], source_fields: [] = ()):
         """Save data in PostgresSQL.
 
         Args:
@@ -31,13 +55,54 @@ class PostgresSaver:
             model: data model Pydantic
             data: list of records Pydantic
             key_fields: List of field names to be used in the instruction ON CONFLICT
+            source_fields: fields read from the source, in merge mode the other fields are not updated
         """
         cur = self.conn.cursor()
         full_table_name = self._full_table_name(table_name)
-        sql = query_build.get_insert_query_for_model_text(model, full_table_name, key_fields)
-        execute_values(cur, sql, [item.dict() for item in data], template=query_build.get_template_insert_model(model))
+        statement = query_build.get_insert_statement(model, full_table_name, key_fields, self.merge, source_fields)
+        if self.load_mode == "copy":
+            self._copy(cur, full_table_name, table_name, model, statement.rows(data), key_fields, source_fields)
+            returned = cur.fetchall() if self.merge else None
+        else:
+            returned = execute_values(cur, statement.sql, statement.rows(data), template=statement.template,
+                                      page_size=len(data), fetch=self.merge is not None)
+        inserted = cur.rowcount if returned is None else sum(1 for row in returned if row[0])
+        updated = 0 if returned is None else len(returned) - inserted
         cur.close()
         self.conn.commit()
+        self.commit_count += 1
+        self._add_stats(table_name, inserted, updated, len(data) - inserted - updated)
+
+    def _add_stats(self, table_name: str, inserted: int, updated: int, unchanged: int):
+        table_stats = self.stats.setdefault(table_name, {"inserted": 0, "updated": 0, "unchanged": 0})
+        table_stats["inserted"] += inserted
+        table_stats["updated"] += updated
+        table_stats["unchanged"] += unchanged
+
+    @classmethod
+    def _copy_value(cls, value) -> str:
+        """Convert the value to the text format of COPY."""
+        if value is None:
+            return "\\N"
+        if isinstance(value, Enum):
+            value = value.value
+        elif isinstance(value, date):
+            value = value.isoformat()
+        return str(value).translate(cls.COPY_ESCAPE)
+
+    def _copy(self, cur, full_table_name: str, table_name: str, model: BaseModel, rows: list[tuple],
+              key_fields: [], source_fields: [] = ()):
+        """Save data through COPY into a temporary table and INSERT ... ON CONFLICT from it."""
+        create_sql, copy_sql, insert_sql = query_build.get_copy_queries_for_model_text(
+            model, full_table_name, "_copy_{}".format(table_name), key_fields, self.merge, source_fields)
+        buffer = StringIO()
+        for row in rows:
+            buffer.write("\t".join([self._copy_value(value) for value in row]))
+            buffer.write("\n")
+        buffer.seek(0)
+        cur.execute(create_sql)
+        cur.copy_expert(copy_sql, buffer)
+        cur.execute(insert_sql)
 
 
 class SQLiteExtractor:
@@ -50,12 +115,24 @@ class SQLiteExtractor:
         """
         self.conn = conn
         self.count_read_entries = count_read_entries
+        # Read statistics for all extracted tables.
+        self.rows_read = 0
+        self.read_seconds = 0.0
+
+    @property
+    def read_throughput(self) -> float:
+        """Rows per second read from SQLite (including conversion to the Pydantic model)."""
+        return self.rows_read / self.read_seconds if self.read_seconds else 0.0
 
     @staticmethod
     def model_factory(model) -> Callable:
         """The closure is returned by row_factory for a specific Pydantic model"""
+        col_names = []
+
         def factory(cursor: Cursor, row: tuple) -> BaseModel:
-            col_names = [col[0] for col in cursor.description]
+            # The description does not change within the query, so the column names are read once.
+            if not col_names:
+                col_names.extend(col[0] for col in cursor.description)
             return model.parse_obj({key: value for key, value in zip(col_names, row)})
 
         return factory
@@ -71,9 +148,14 @@ class SQLiteExtractor:
         Yields:
             A list with no more than count_read_entries-entries containing table entries in the Pydantic Model
         """
-        self.conn.row_factory = self.model_factory(model)
         cur = self.conn.cursor()
-        cur.execute(query_build.get_select_query_text(fields, table_name))
+        cur.row_factory = self.model_factory(model)
+        start = perf_counter()
+        # Rowid order is the physical order of the table, so SQLite reads it sequentially without sorting.
+        cur.execute(query_build.get_select_query_text(fields, table_name, order_by_rowid=True))
         while data := cur.fetchmany(size=self.count_read_entries):
+            self.rows_read += len(data)
+            self.read_seconds += perf_counter() - start
             yield data
+            start = perf_counter()
         cur.close()
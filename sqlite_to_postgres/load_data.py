@@ -2,6 +2,7 @@
 from contextlib import contextmanager
 import logging
 import sqlite3
+from pathlib import Path
 
 import psycopg2
 from psycopg2.extensions import connection as _connection
@@ -10,35 +11,73 @@ from psycopg2.extras import DictCursor, register_uuid
 import models
 from config import settings
 from db_exchange import PostgresSaver, SQLiteExtractor
+from query_build import MergeOptions
 
 
 @contextmanager
-def conn_context(db_path: str):
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+def conn_context(db_path: str, mmap_size: int = 0, cache_size_kib: int = 0):
+    """Open the SQLite source database read-only.
+
+    Args:
+        db_path: path to SQLite database file
+        mmap_size: the number of bytes of the database file that are memory-mapped
+        cache_size_kib: the size of the page cache in KiB
+    """
+    conn = sqlite3.connect("{}?mode=ro".format(Path(db_path).resolve().as_uri()), uri=True)
+    conn.execute("PRAGMA query_only = ON")
+    if mmap_size:
+        conn.execute("PRAGMA mmap_size = {:d}".format(mmap_size))
+    if cache_size_kib:
+        # A negative value sets the cache size in KiB instead of pages.
+        conn.execute("PRAGMA cache_size = -{:d}".format(cache_size_kib))
     yield conn
     conn.close()
 
 
-def load_from_sqlite(connection: sqlite3.Connection, pgconn: _connection, count_entries, default_key_name):
-    postgres_saver = PostgresSaver(pgconn, settings.get("schema_dest_db", ""))
+def load_table(sqlite_extractor: SQLiteExtractor, postgres_saver: PostgresSaver, table, default_key_name) -> bool:
+    """Copy one table from the application settings. Returns False if an error occurred."""
+    model = getattr(models, table.model_name)
+    key_fields = table.get("key_fields", default=[default_key_name])
+    try:
+        data = sqlite_extractor.extract(table.name, model, table.fields)
+        for part_data in data:
+            postgres_saver.save(table.name, model, part_data, key_fields, table.fields)
+    except sqlite3.Error as e:
+        logging.error("Read table \"{}\": {}".format(table.model_name, e))
+        return False
+    except psycopg2.Error as e:
+        logging.error("Write table \"{}\": {}".format(table.model_name, e))
+        return False
+    return True
+
+
+def get_merge_options() -> MergeOptions | None:
+    """Merge mode settings: existing records with changed content are updated instead of skipped."""
+    if not settings.get("merge", False):
+        return None
+    return MergeOptions(tuple(settings.get("merge_skip_fields", [])), tuple(settings.get("merge_untracked_fields", [])))
+
+
+def load_from_sqlite(connection: sqlite3.Connection, pgconn: _connection, count_entries, default_key_name,
+                     load_mode: str = "execute_values", merge: MergeOptions | None = None):
+    postgres_saver = PostgresSaver(pgconn, settings.get("schema_dest_db", ""), load_mode, merge)
     sqlite_extractor = SQLiteExtractor(connection, count_entries)
     for table in settings.tables:
-        model = getattr(models, table.model_name)
-        key_fields = table.get("key_fields", default=[default_key_name])
-        try:
-            data = sqlite_extractor.extract(table.name, model, table.fields)
-            for part_data in data:
-                postgres_saver.save(table.name, model, part_data, key_fields)
-        except sqlite3.Error as e:
-            logging.error("Read table \"{}\": {}".format(table.model_name, e))
-        except psycopg2.Error as e:
-            logging.error("Write table \"{}\": {}".format(table.model_name, e))
+        load_table(sqlite_extractor, postgres_saver, table, default_key_name)
+        table_stats = postgres_saver.stats.get(table.name, {})
+        logging.info("Table \"{}\": inserted {}, updated {}, unchanged {}".format(
+            table.name, table_stats.get("inserted", 0), table_stats.get("updated", 0),
+            table_stats.get("unchanged", 0)))
+    logging.info("Read {} rows from SQLite, {:.0f} rows/s".format(
+        sqlite_extractor.rows_read, sqlite_extractor.read_throughput))
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
     sqlite_path = settings.sqlite_db_path
-    with (conn_context(sqlite_path) as sqlite_conn,
+    with (conn_context(sqlite_path, settings.get("sqlite_mmap_size", 0),
+                       settings.get("sqlite_cache_size_kib", 0)) as sqlite_conn,
           psycopg2.connect(**settings.pg_dsl, cursor_factory=DictCursor) as pgconn):
         register_uuid()
-        load_from_sqlite(sqlite_conn, pgconn, settings.count_entries, settings.get("key_field_name"))
+        load_from_sqlite(sqlite_conn, pgconn, settings.count_entries, settings.get("key_field_name"),
+                         settings.get("load_mode", "execute_values"), get_merge_options())
@@ -1,13 +1,45 @@
 """Module for generation SQL-query."""
+from functools import lru_cache
+from operator import attrgetter
+from typing import Callable, NamedTuple
+
 from pydantic import BaseModel
 
 
-def get_select_query_text(fields: [str], table_name: str, aliases: {} = {}) -> str:
+# Alias of the destination table in the INSERT query, used to compare old and new values on conflict.
+DEST_ALIAS = "dest"
+# In merge mode each inserted or updated record returns whether it was inserted.
+MERGE_RETURNING_TEXT = "\nRETURNING (xmax = 0) AS inserted"
+
+
+class MergeOptions(NamedTuple):
+    """Settings of the merge mode, in which conflicting records are updated if their content has changed."""
+    # Fields that are never updated (e.g. "id", "created").
+    skip_fields: tuple[str, ...] = ()
+    # Fields that are updated, but not compared (e.g. "modified").
+    untracked_fields: tuple[str, ...] = ()
+
+
+class InsertStatement(NamedTuple):
+    """Insert query compiled once for (model, table, conflict fields)."""
+    sql: str
+    # Positional template of one record for execute_values, e.g. "(%s, %s)".
+    template: str
+    fields: tuple[str, ...]
+    # Returns the tuple of the record values in the order of fields.
+    row_getter: Callable[[BaseModel], tuple]
+
+    def rows(self, data: list[BaseModel]) -> list[tuple]:
+        return [self.row_getter(item) for item in data]
+
+
+def get_select_query_text(fields: [str], table_name: str, aliases: {} = {}, order_by_rowid: bool = False) -> str:
     """Get SQL select query for table 'table_name' with fields.
     Args:
         fields: table fields involved in the sql query
         table_name: table name
         aliases: aliases for table fields
+        order_by_rowid: read SQLite table in rowid order
 
     Returns:
         Text SQL select query.
@@ -17,33 +49,126 @@ def get_select_query_text(fields: [str], table_name: str, aliases: {} = {}) -> s
         alias_as = " as \"{0}\"" if field in aliases else ""
         prepared_fields_list.append("\"{0}\"{1}".format(field, alias_as))
     str_fields = ", ".join(prepared_fields_list)
-    return "SELECT {0} \nFROM {1}".format(str_fields, table_name)
+    order_text = "\nORDER BY rowid" if order_by_rowid else ""
+    return "SELECT {0} \nFROM {1}{2}".format(str_fields, table_name, order_text)
 
 
-def get_insert_query_for_model_text(model: BaseModel, table_name: str, conflict_fields: [] = []) -> str:
+def get_insert_query_for_model_text(model: BaseModel, table_name: str, conflict_fields: [] = [],
+                                    merge: MergeOptions | None = None, source_fields: [] = ()) -> str:
     """Get SQL insert query for table 'table_name'. Insert records - list Pydantic-model.
     Args:
         model: Pydantic model class for insert records.
         table_name: table name
         conflict_fields: list of fields that will be present in the CONFLICT ON zone.
+        merge: if set, the conflicting records are updated when their content has changed.
+        source_fields: fields read from the source (by alias), only they are updated in merge mode.
 
     Returns:
         Text SQL insert query.
     """
     str_fields = ", ".join(["\"{0}\"".format(field) for field in model.__fields__.keys()])
-    conflict_text = ""
-    if len(conflict_fields) > 0:
-        conflict_fields_str = ", ".join(["\"{}\"".format(field) for field in conflict_fields if field])
-        conflict_text = "\nON CONFLICT ({0}) DO NOTHING".format(conflict_fields_str)
-    return "INSERT INTO {0} ({1}) \nVALUES %s{2};".format(table_name, str_fields, conflict_text)
-
-
-def get_template_insert_model(model: BaseModel):
-    """Get a template for describing multiple insertion values.
-        Args:
-            model: Pydantic model class for insert records.
-        Returns:
-            Template for describing multiple insertion values.
-        """
-    str_fields = ", ".join(["%({0})s".format(field) for field in model.__fields__.keys()])
-    return "({0})".format(str_fields)
+    conflict_text = get_conflict_text(conflict_fields, *get_merge_fields(model, conflict_fields, merge, source_fields))
+    return "INSERT INTO {0} AS \"{1}\" ({2}) \nVALUES %s{3}{4};".format(
+        table_name, DEST_ALIAS, str_fields, conflict_text, MERGE_RETURNING_TEXT if merge else "")
+
+
+def get_merge_fields(model: BaseModel, conflict_fields: [], merge: MergeOptions | None,
+                     source_fields: [] = ()) -> tuple[list, list]:
+    """Get the fields updated on conflict and the fields compared to detect changes.
+
+    Fields of the model that are not read from the source (e.g. "file_path") keep their values in PostgresSQL.
+    Without source_fields all fields of the model are used.
+    """
+    if merge is None:
+        return [], []
+    update_fields = [name for name, field in model.__fields__.items()
+                     if (not source_fields or field.alias in source_fields)
+                     and name not in conflict_fields and name not in merge.skip_fields]
+    compare_fields = [field for field in update_fields if field not in merge.untracked_fields]
+    return update_fields, compare_fields
+
+
+def get_conflict_text(conflict_fields: [] = [], update_fields: [] = [], compare_fields: [] = []) -> str:
+    """Get the ON CONFLICT clause for conflict_fields (empty if there are no fields).
+
+    Without compare_fields conflicting records are skipped. Otherwise update_fields are updated only
+    for records with changed compare_fields, so unchanged records keep their row version and "modified".
+    """
+    if len(conflict_fields) == 0:
+        return ""
+    conflict_fields_str = ", ".join(["\"{}\"".format(field) for field in conflict_fields if field])
+    if len(compare_fields) == 0:
+        return "\nON CONFLICT ({0}) DO NOTHING".format(conflict_fields_str)
+    set_str = ", ".join(["\"{0}\" = EXCLUDED.\"{0}\"".format(field) for field in update_fields])
+    dest_str = ", ".join(["\"{0}\".\"{1}\"".format(DEST_ALIAS, field) for field in compare_fields])
+    excluded_str = ", ".join(["EXCLUDED.\"{0}\"".format(field) for field in compare_fields])
+    return "\nON CONFLICT ({0}) DO UPDATE SET {1} \nWHERE ({2}) IS DISTINCT FROM ({3})".format(
+        conflict_fields_str, set_str, dest_str, excluded_str)
+
+
+def get_copy_queries_for_model_text(model: BaseModel, table_name: str, temp_table_name: str,
+                                    conflict_fields: [] = [], merge: MergeOptions | None = None,
+                                    source_fields: [] = ()) -> tuple[str, str, str]:
+    """Get SQL queries for loading records through COPY into a temporary table.
+
+    COPY can't skip conflicting records, so they are copied into a temporary table first
+    and then inserted into the table 'table_name' with ON CONFLICT.
+    Args:
+        model: Pydantic model class for insert records.
+        table_name: table name
+        temp_table_name: temporary table name
+        conflict_fields: list of fields that will be present in the CONFLICT ON zone.
+        merge: if set, the conflicting records are updated when their content has changed.
+        source_fields: fields read from the source (by alias), only they are updated in merge mode.
+
+    Returns:
+        Texts of SQL queries (create temporary table, COPY, insert from temporary table).
+    """
+    return _compile_copy_queries(model, table_name, temp_table_name, tuple(conflict_fields), merge,
+                                 tuple(source_fields))
+
+
+@lru_cache(maxsize=None)
+def _compile_copy_queries(model: BaseModel, table_name: str, temp_table_name: str,
+                          conflict_fields: tuple, merge: MergeOptions | None,
+                          source_fields: tuple) -> tuple[str, str, str]:
+    str_fields = ", ".join(["\"{0}\"".format(field) for field in model.__fields__.keys()])
+    create_text = (
+        "CREATE TEMP TABLE IF NOT EXISTS \"{0}\" \n(LIKE {1} INCLUDING DEFAULTS) ON COMMIT DELETE ROWS;".format(
+            temp_table_name, table_name)
+    )
+    copy_text = "COPY \"{0}\" ({1}) FROM STDIN".format(temp_table_name, str_fields)
+    conflict_text = get_conflict_text(list(conflict_fields),
+                                      *get_merge_fields(model, conflict_fields, merge, source_fields))
+    insert_text = "INSERT INTO {0} AS \"{1}\" ({2}) \nSELECT {2} FROM \"{3}\"{4}{5};".format(
+        table_name, DEST_ALIAS, str_fields, temp_table_name, conflict_text, MERGE_RETURNING_TEXT if merge else "")
+    return create_text, copy_text, insert_text
+
+
+def get_insert_statement(model: BaseModel, table_name: str, conflict_fields: [] = [],
+                         merge: MergeOptions | None = None, source_fields: [] = ()) -> InsertStatement:
+    """Get the compiled insert statement for the model. Statements are cached, so SQL is built once per table.
+    Args:
+        model: Pydantic model class for insert records.
+        table_name: table name
+        conflict_fields: list of fields that will be present in the CONFLICT ON zone.
+        merge: if set, the conflicting records are updated when their content has changed.
+        source_fields: fields read from the source (by alias), only they are updated in merge mode.
+
+    Returns:
+        Compiled insert statement with the positional template.
+    """
+    return _compile_insert_statement(model, table_name, tuple(conflict_fields), merge, tuple(source_fields))
+
+
+@lru_cache(maxsize=None)
+def _compile_insert_statement(model: BaseModel, table_name: str, conflict_fields: tuple,
+                              merge: MergeOptions | None, source_fields: tuple) -> InsertStatement:
+    fields = tuple(model.__fields__.keys())
+    getter = attrgetter(*fields)
+    return InsertStatement(
+        sql=get_insert_query_for_model_text(model, table_name, list(conflict_fields), merge, source_fields),
+        template="({0})".format(", ".join(["%s"] * len(fields))),
+        fields=fields,
+        row_getter=getter if len(fields) > 1 else lambda item: (getter(item),),
+    )
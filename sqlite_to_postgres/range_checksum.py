@@ -0,0 +1,315 @@
+"""Checksum-based consistency check of SQLite source and PostgresSQL destination.
+
+Each side computes order-independent checksums of rows grouped by the prefix of the key field
+(a Merkle tree over key ranges). Only ranges whose checksums differ are drilled into, so rows are
+transferred only for the ranges that really differ.
+"""
+from abc import ABC, abstractmethod
+from datetime import date, datetime, timezone
+from enum import Enum
+from hashlib import md5
+from sqlite3 import Connection as SqliteConnection
+from typing import Any
+from uuid import UUID
+
+from psycopg2.extensions import connection as psql_connection
+from pydantic import BaseModel
+from pydantic.fields import ModelField
+
+# The checksum of a range is the sum of row hashes modulo 2^64, so it does not depend on the order of rows.
+CHECKSUM_MODULUS = 2 ** 64
+NULL_MARKER = "<null>"
+FIELD_SEPARATOR = "|"
+
+
+class TableLayout(BaseModel):
+    """Description of a copied table on both sides."""
+    source_table: str
+    dest_table: str
+    fields: list[str]
+    dest_fields: list[str]
+    key_fields: list[str]
+    model_fields: list[ModelField]
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @classmethod
+    def from_settings(cls, table_settings, model: BaseModel, schema: str, default_key_name: str) -> "TableLayout":
+        """Build a layout from the table entry of the application settings.
+
+        For tables that are binders for many-to-many, the id is excluded because it is generated on both sides.
+        """
+        key_fields = list(table_settings.get("key_fields", default=[default_key_name]))
+        fields = [field for field in table_settings.fields
+                  if field != default_key_name or default_key_name in key_fields]
+        aliases = table_settings.get("aliases", default={})
+        model_fields = {field.alias: field for field in model.__fields__.values()}
+        dest_table = "\"{0}\".\"{1}\"".format(schema, table_settings.name) if schema else table_settings.name
+        return cls(
+            source_table=table_settings.name,
+            dest_table=dest_table,
+            fields=fields,
+            dest_fields=[aliases.get(field, field) for field in fields],
+            key_fields=key_fields,
+            model_fields=[model_fields[field] for field in fields],
+        )
+
+    @property
+    def range_field(self) -> str:
+        """The key field whose prefix splits the table into ranges."""
+        return self.key_fields[0]
+
+    @property
+    def dest_key_fields(self) -> list[str]:
+        return [self.dest_fields[self.fields.index(field)] if field in self.fields else field
+                for field in self.key_fields]
+
+
+class TableDifference(BaseModel):
+    """Keys of the records that differ between the source and the destination."""
+    table: str
+    missing: list[tuple] = []  # present in the source only
+    extra: list[tuple] = []  # present in the destination only
+    changed: list[tuple] = []  # present on both sides with different content
+
+    @property
+    def is_consistent(self) -> bool:
+        return not (self.missing or self.extra or self.changed)
+
+
+def canonical_text(field: ModelField, value: Any) -> str:
+    """Convert the field value to the text that the destination side produces in SQL."""
+    if value is not None:
+        value, errors = field.validate(value, {}, loc=field.alias)
+        if errors:
+            raise ValueError("Invalid value {!r} of field \"{}\"".format(value, field.alias))
+    if value is None:
+        return NULL_MARKER
+    if isinstance(value, Enum):
+        return str(value.value)
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float):
+        return "{:.6f}".format(value)
+    return str(value)
+
+
+def canonical_sql(field: ModelField, column: str) -> str:
+    """SQL expression of PostgresSQL that converts the column to the text of canonical_text."""
+    if issubclass(field.type_, datetime):
+        expression = "to_char({} AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS.US')".format(column)
+    elif issubclass(field.type_, date):
+        expression = "to_char({}, 'YYYY-MM-DD')".format(column)
+    elif issubclass(field.type_, float):
+        expression = "round({}::numeric, 6)::text".format(column)
+    else:
+        expression = "{}::text".format(column)
+    return "COALESCE({}, '{}')".format(expression, NULL_MARKER)
+
+
+def row_hash(row_text: str) -> int:
+    """The first 64 bits of md5 as signed integer, the same as ('x' || md5)::bit(64)::bigint in PostgresSQL."""
+    value = int(md5(row_text.encode("utf-8")).hexdigest()[:16], 16)
+    return value - CHECKSUM_MODULUS if value >= CHECKSUM_MODULUS // 2 else value
+
+
+def prefix_bounds(prefix: str) -> tuple[str | None, str | None]:
+    """Range [lower, upper) of UUID keys starting with the hex prefix."""
+    if not prefix:
+        return None, None
+    lower = str(UUID(hex=prefix.ljust(32, "0")))
+    next_prefix = int(prefix, 16) + 1
+    if next_prefix >= 16 ** len(prefix):
+        return lower, None
+    return lower, str(UUID(hex=format(next_prefix, "0{}x".format(len(prefix))).ljust(32, "0")))
+
+
+class RangeChecksumSide(ABC):
+    """One side of the comparison."""
+    placeholder = "?"
+
+    def __init__(self, layout: TableLayout):
+        self.layout = layout
+        self.range_field = layout.range_field
+
+    def _range_where(self, prefix: str) -> tuple[str, list]:
+        """WHERE clause selecting the keys starting with prefix. Uses the index of the key field."""
+        lower, upper = prefix_bounds(prefix)
+        conditions, params = [], []
+        if lower is not None:
+            conditions.append("\"{}\" >= {}".format(self.range_field, self.placeholder))
+            params.append(lower)
+        if upper is not None:
+            conditions.append("\"{}\" < {}".format(self.range_field, self.placeholder))
+            params.append(upper)
+        return ("\nWHERE " + " AND ".join(conditions)) if conditions else "", params
+
+    @abstractmethod
+    def bucket_checksums(self, prefix: str, depth: int) -> dict[str, tuple[int, int]]:
+        """Get {key prefix of length depth: (count, checksum)} for the keys starting with prefix."""
+
+    @abstractmethod
+    def row_hashes(self, prefix: str) -> dict[tuple, int]:
+        """Get {key: row hash} for the keys starting with prefix."""
+
+
+class SQLiteRangeChecksum(RangeChecksumSide):
+    """Checksums of the SQLite source. Values are converted by the Pydantic model, as when loading."""
+    def __init__(self, conn: SqliteConnection, layout: TableLayout):
+        super().__init__(layout)
+        self.conn = conn
+        model_fields = layout.model_fields
+
+        def sqlite_row_hash(*values) -> int:
+            return row_hash(FIELD_SEPARATOR.join(
+                canonical_text(field, value) for field, value in zip(model_fields, values)))
+
+        class SQLiteRangeChecksumAggregate:
+            def __init__(self):
+                self.checksum = 0
+
+            def step(self, *values):
+                self.checksum += sqlite_row_hash(*values)
+
+            def finalize(self) -> str:
+                # The sum can overflow the integer of SQLite, so it is returned as text.
+                return str(self.checksum % CHECKSUM_MODULUS)
+
+        self.conn.create_function("range_row_hash", -1, sqlite_row_hash)
+        self.conn.create_aggregate("range_checksum", -1, SQLiteRangeChecksumAggregate)
+
+    def _fields_str(self) -> str:
+        return ", ".join(["\"{}\"".format(field) for field in self.layout.fields])
+
+    def bucket_checksums(self, prefix: str, depth: int) -> dict[str, tuple[int, int]]:
+        where, params = self._range_where(prefix)
+        sql = "SELECT substr(\"{0}\", 1, {1}), count(*), range_checksum({2}) \nFROM \"{3}\"{4}\nGROUP BY 1".format(
+            self.range_field, depth, self._fields_str(), self.layout.source_table, where)
+        cur = self.conn.execute(sql, params)
+        result = {bucket: (count, int(checksum)) for bucket, count, checksum in cur}
+        cur.close()
+        return result
+
+    def row_hashes(self, prefix: str) -> dict[tuple, int]:
+        where, params = self._range_where(prefix)
+        key_str = ", ".join(["\"{}\"".format(field) for field in self.layout.key_fields])
+        sql = "SELECT {0}, range_row_hash({1}) \nFROM \"{2}\"{3}".format(
+            key_str, self._fields_str(), self.layout.source_table, where)
+        cur = self.conn.execute(sql, params)
+        result = {tuple(str(value) for value in row[:-1]): int(row[-1]) for row in cur}
+        cur.close()
+        return result
+
+
+class PostgresRangeChecksum(RangeChecksumSide):
+    """Checksums of the PostgresSQL destination. Calculated on the server, only checksums are transferred."""
+    placeholder = "%s"
+
+    def __init__(self, conn: psql_connection, layout: TableLayout):
+        super().__init__(layout)
+        self.conn = conn
+        row_text = "concat_ws('{0}', {1})".format(FIELD_SEPARATOR, ", ".join([
+            canonical_sql(field, "\"{}\"".format(column))
+            for field, column in zip(layout.model_fields, layout.dest_fields)
+        ]))
+        self.row_hash_sql = "('x' || substr(md5({}), 1, 16))::bit(64)::bigint".format(row_text)
+        self.range_field = layout.dest_key_fields[0]
+
+    def bucket_checksums(self, prefix: str, depth: int) -> dict[str, tuple[int, int]]:
+        where, params = self._range_where(prefix)
+        sql = "SELECT substr(\"{0}\"::text, 1, {1}), count(*), sum({2}) \nFROM {3}{4}\nGROUP BY 1".format(
+            self.range_field, depth, self.row_hash_sql, self.layout.dest_table, where)
+        cur = self.conn.cursor()
+        cur.execute(sql, params)
+        result = {bucket: (count, int(checksum) % CHECKSUM_MODULUS) for bucket, count, checksum in cur.fetchall()}
+        cur.close()
+        return result
+
+    def row_hashes(self, prefix: str) -> dict[tuple, int]:
+        where, params = self._range_where(prefix)
+        key_str = ", ".join(["\"{}\"::text".format(field) for field in self.layout.dest_key_fields])
+        sql = "SELECT {0}, {1} \nFROM {2}{3}".format(key_str, self.row_hash_sql, self.layout.dest_table, where)
+        cur = self.conn.cursor()
+        cur.execute(sql, params)
+        result = {tuple(row[:-1]): int(row[-1]) for row in cur.fetchall()}
+        cur.close()
+        return result
+
+
+class MerkleConsistencyChecker:
+    """Compares two sides by key ranges and drills into the ranges with different checksums."""
+    def __init__(self, source: RangeChecksumSide, dest: RangeChecksumSide, leaf_size: int = 1000,
+                 max_depth: int = 8):
+        """Init the checker.
+
+        Args:
+            source: checksums of the source DB
+            dest: checksums of the destination DB
+            leaf_size: ranges with no more records are compared row by row
+            max_depth: the maximum length of the key prefix (8 hex digits before the first dash of UUID)
+        """
+        self.source = source
+        self.dest = dest
+        self.leaf_size = leaf_size
+        self.max_depth = min(max_depth, 8)
+
+    def compare(self) -> TableDifference:
+        difference = TableDifference(table=self.source.layout.source_table)
+        self._compare_range("", difference)
+        return difference
+
+    def _compare_range(self, prefix: str, difference: TableDifference):
+        depth = len(prefix) + 1
+        source_buckets = self.source.bucket_checksums(prefix, depth)
+        dest_buckets = self.dest.bucket_checksums(prefix, depth)
+        for bucket in sorted(set(source_buckets) | set(dest_buckets)):
+            source_bucket = source_buckets.get(bucket, (0, 0))
+            dest_bucket = dest_buckets.get(bucket, (0, 0))
+            if source_bucket == dest_bucket:
+                continue
+            if depth >= self.max_depth or max(source_bucket[0], dest_bucket[0]) <= self.leaf_size:
+                self._compare_rows(bucket, difference)
+            else:
+                self._compare_range(bucket, difference)
+
+    def _compare_rows(self, prefix: str, difference: TableDifference):
+        source_rows = self.source.row_hashes(prefix)
+        dest_rows = self.dest.row_hashes(prefix)
+        for key, value in sorted(source_rows.items()):
+            if key not in dest_rows:
+                difference.missing.append(key)
+            elif dest_rows[key] != value:
+                difference.changed.append(key)
+        difference.extra.extend(sorted(key for key in dest_rows if key not in source_rows))
+
+
+def check_table(sqlite_conn: SqliteConnection, pg_conn: psql_connection, layout: TableLayout,
+                leaf_size: int = 1000) -> TableDifference:
+    """Check the consistency of one table."""
+    return MerkleConsistencyChecker(
+        SQLiteRangeChecksum(sqlite_conn, layout), PostgresRangeChecksum(pg_conn, layout), leaf_size
+    ).compare()
+
+
+if __name__ == "__main__":
+    import sqlite3
+    from contextlib import closing
+
+    import psycopg2
+
+    import models
+    from config import settings
+
+    with (closing(sqlite3.connect(settings.sqlite_db_path)) as sqlite_conn,
+          closing(psycopg2.connect(**settings.pg_dsl)) as pg_conn):
+        for table in settings.tables:
+            table_layout = TableLayout.from_settings(table, getattr(models, table.model_name),
+                                                     settings.get("schema_dest_db", ""), settings.key_field_name)
+            result = check_table(sqlite_conn, pg_conn, table_layout, settings.get("checksum_leaf_size", 1000))
+            print("{}: {}".format(table.name, "consistent" if result.is_consistent else "differences found"))
+            for kind in ("missing", "extra", "changed"):
+                for key in getattr(result, kind):
+                    print("  {} {}".format(kind, ", ".join(key)))
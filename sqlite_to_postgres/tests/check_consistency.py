@@ -7,7 +7,9 @@ import pytest
 import psycopg2
 from psycopg2.extensions import connection as pg_connection
 
+from .. import models
 from ..config import settings
+from ..range_checksum import TableLayout, check_table
 
 
 def convert_timestamp_with_time_zone(val):
@@ -83,3 +85,14 @@ def test_similarity_table(sqlite_connect: sqlite3.Connection, pg_connect: pg_con
         pg_records = pg_cur.fetchmany(settings.count_entries)
         assert len(sqlite_records) == len(pg_records)
         assert sqlite_records == pg_records
+
+
+@pytest.mark.parametrize("table_name, table_copy_settings",
+                         [pytest.param(table.name, table) for table in settings.tables])
+def test_checksum_table(sqlite_connect: sqlite3.Connection, pg_connect: pg_connection,
+                        table_name: str, table_copy_settings: dict):
+    """The test compares checksums of key ranges and reports the keys of the different records."""
+    layout = TableLayout.from_settings(table_copy_settings, getattr(models, table_copy_settings.model_name),
+                                       settings.schema_dest_db, settings.key_field_name)
+    difference = check_table(sqlite_connect, pg_connect, layout, settings.count_entries)
+    assert difference.is_consistent, difference
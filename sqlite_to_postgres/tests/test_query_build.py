@@ -0,0 +1,29 @@
+"""Merge mode updates and compares only the fields read from SQLite."""
+from .. import models
+from ..query_build import MergeOptions, get_insert_query_for_model_text, get_merge_fields
+
+MERGE = MergeOptions(("id", "created"), ("modified",))
+FILM_WORK_SOURCE_FIELDS = ["id", "title", "description", "creation_date", "rating", "type", "created_at", "updated_at"]
+
+
+def test_merge_fields_are_taken_from_source_fields():
+    update_fields, compare_fields = get_merge_fields(models.FilmWork, ["id"], MERGE, FILM_WORK_SOURCE_FIELDS)
+    assert "file_path" not in update_fields
+    assert "file_path" not in compare_fields
+    assert "modified" in update_fields
+    assert "modified" not in compare_fields
+    assert "title" in compare_fields
+
+
+def test_merge_query_does_not_overwrite_file_path():
+    sql = get_insert_query_for_model_text(models.FilmWork, "content.film_work", ["id"], MERGE,
+                                          FILM_WORK_SOURCE_FIELDS)
+    conflict_text = sql[sql.index("ON CONFLICT"):]
+    assert "file_path" not in conflict_text
+    # The value is still inserted for new records.
+    assert "\"file_path\"" in sql[:sql.index("ON CONFLICT")]
+
+
+def test_merge_fields_without_source_fields_use_the_model():
+    update_fields, _ = get_merge_fields(models.FilmWork, ["id"], MERGE)
+    assert "file_path" in update_fields
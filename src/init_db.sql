@@ -1 +1,3 @@
-CREATE SCHEMA IF NOT EXISTS content;
\ No newline at end of file
+CREATE SCHEMA IF NOT EXISTS content;
+-- The search path for connections through pgbouncer, which does not pass the "options" startup parameter.
+ALTER ROLE CURRENT_USER SET search_path = public, content;